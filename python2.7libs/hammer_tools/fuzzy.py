@@ -0,0 +1,174 @@
+import re
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Rows matched or weighted between two checks whether a search was cancelled
+CANCEL_CHECK_INTERVAL = 512
+
+
+def fuzzyMatch(pattern, word):
+    if pattern == word:
+        return True, 999999
+    # Squared lengths of the runs of consecutive matched characters, found by str.find instead of a loop over the word
+    weight = 0
+    count = 0
+    position = -1
+    for char in pattern:
+        next_position = word.find(char, position + 1)
+        if next_position == -1:
+            return False, weight + count * count
+        if next_position == position + 1 or count == 0:
+            count += 1
+        else:
+            weight += count * count
+            count = 1
+        position = next_position
+    return True, weight + count * count
+
+
+def fuzzyMatchWeight(pattern, word):
+    return fuzzyMatch(pattern, word)[1]
+
+
+def charMask(text):
+    # Characters share bits, so the mask can only tell that a text does not contain some character of a pattern
+    mask = 0
+    for char in set(text):
+        mask |= 1 << (ord(char) & 63)
+    return mask
+
+
+def subsequencePattern(pattern):
+    return re.compile('.*?'.join(re.escape(char) for char in pattern), re.DOTALL)
+
+
+def maskCandidates(masks, pattern):
+    pattern_mask = charMask(pattern)
+    if np is not None:
+        pattern_mask = np.uint64(pattern_mask)
+        return np.flatnonzero((masks & pattern_mask) == pattern_mask).tolist()
+    return [index for index, mask in enumerate(masks) if mask & pattern_mask == pattern_mask]
+
+
+def matchRows(texts, masks, pattern, rows=None, cancelled=None):
+    # Returns None if cancelled() became true, it is checked every CANCEL_CHECK_INTERVAL rows
+    if not pattern:
+        return list(range(len(texts))) if rows is None else list(rows)
+
+    search = subsequencePattern(pattern).search
+    if rows is None:
+        rows = maskCandidates(masks, pattern)
+    matched = []
+    for count, row in enumerate(rows, 1):
+        if cancelled is not None and count % CANCEL_CHECK_INTERVAL == 0 and cancelled():
+            return
+        if search(texts[row]):
+            matched.append(row)
+    return matched
+
+
+# Ranks all the texts of a list against a pattern in one call
+class FuzzyIndex(object):
+    def __init__(self, weight=fuzzyMatchWeight, case_sensitive=False):
+        self._weight = weight
+        self._case_sensitive = case_sensitive
+        self._texts = ()
+        self._sort_texts = ()
+        self._masks = ()
+        self._last_pattern = None
+        self._last_matches = None
+        self._last_ranks = None
+        # The last result may be used by a worker thread and by the GUI thread
+        self._lock = threading.Lock()
+
+    def setCaseSensitive(self, case_sensitive):
+        # The stored texts may be lowered already, so they have to be set again
+        if case_sensitive != self._case_sensitive:
+            self._case_sensitive = case_sensitive
+            self.setTexts(())
+
+    def setTexts(self, texts, sort_texts=None):
+        # Texts are lowered once here instead of in every comparison
+        if self._case_sensitive:
+            texts = tuple(texts)
+            sort_texts = tuple(sort_texts) if sort_texts is not None else texts
+        else:
+            texts = tuple(text.lower() for text in texts)
+            sort_texts = tuple(text.lower() for text in sort_texts) if sort_texts is not None else texts
+
+        masks = [charMask(text) for text in texts]
+        if np is not None:
+            masks = np.array(masks, dtype=np.uint64)
+
+        with self._lock:
+            self._texts = texts
+            self._sort_texts = sort_texts
+            self._masks = masks
+            self._last_pattern = None
+            self._last_matches = None
+            self._last_ranks = None
+
+    def __len__(self):
+        return len(self._texts)
+
+    def candidates(self, pattern):
+        return maskCandidates(self._masks, pattern)
+
+    def matches(self, pattern, rows=None):
+        if not self._case_sensitive:
+            pattern = pattern.lower()
+        return matchRows(self._texts, self._masks, pattern, rows)
+
+    def ranks(self, pattern, cancelled=None):
+        # Rank of every text, 0 is the best match and -1 means no match.
+        # Returns None if cancelled() became true, only whole results are kept as the last one
+        if not self._case_sensitive:
+            pattern = pattern.lower()
+
+        # The lock is held only to read and to publish the last result, so the GUI thread never waits for
+        # a search of a worker thread
+        with self._lock:
+            if pattern == self._last_pattern:
+                return self._last_ranks
+            texts = self._texts
+            sort_texts = self._sort_texts
+            masks = self._masks
+            last_pattern = self._last_pattern
+            last_matches = self._last_matches
+
+        # While typing, only the texts that matched the previous pattern are tested again.
+        # Every text that matches a pattern also matches the patterns that are its subsequences
+        narrows = last_matches is not None and fuzzyMatch(last_pattern, pattern)[0]
+        matched = matchRows(texts, masks, pattern, last_matches if narrows else None, cancelled)
+        if matched is None:
+            return
+        matches = list(matched)
+
+        weight = self._weight
+        weights = {}
+        for count, row in enumerate(matched, 1):
+            if cancelled is not None and count % CANCEL_CHECK_INTERVAL == 0 and cancelled():
+                return
+            weights[row] = weight(pattern, sort_texts[row])
+        matched.sort(key=lambda row: -weights[row])
+
+        if np is not None:
+            ranks = np.full(len(texts), -1, dtype=np.int32)
+            ranks[np.array(matched, dtype=np.intp)] = np.arange(len(matched), dtype=np.int32)
+            ranks = ranks.tolist()
+        else:
+            ranks = [-1] * len(texts)
+            for rank, row in enumerate(matched):
+                ranks[row] = rank
+
+        with self._lock:
+            # The texts may have been replaced during the search
+            if self._texts is texts:
+                self._last_pattern = pattern
+                self._last_matches = matches
+                self._last_ranks = ranks
+        return ranks
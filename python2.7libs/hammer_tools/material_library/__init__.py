@@ -1 +1,2 @@
-from .viewer_window import MaterialLibraryViewerWindow
+# The viewer window is imported from hammer_tools.material_library.viewer_window, so that the library modules
+# and the headless thumbnail worker can be imported without creating any widgets or icons
@@ -9,7 +9,7 @@ from ..widgets import LocationField, ComboBox, InputField
 from . import ui
 from .library_options_widget import LibraryOptionsWidget
 from .library import Library
-from .text import MONOSPACE_FONT
+from .text import monospaceFont
 
 
 class Target:
@@ -167,7 +167,7 @@ class AddFolderContentDialog(QDialog):
         naming_tab_layout.addWidget(self._remove_chars_label, 2, 0)
 
         self._chars_to_replace_with_spaces_field = InputField('*')
-        self._chars_to_replace_with_spaces_field.setFont(MONOSPACE_FONT)
+        self._chars_to_replace_with_spaces_field.setFont(monospaceFont())
         naming_tab_layout.addWidget(self._chars_to_replace_with_spaces_field, 2, 1)
 
         self._remove_repeated_spaces_toggle = QCheckBox('Remove repeated spaces')
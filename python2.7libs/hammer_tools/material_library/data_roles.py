@@ -7,3 +7,5 @@ InternalDataRole = Qt.UserRole + 10
 FavoriteRole = Qt.UserRole + 11
 CommentRole = Qt.UserRole + 12
 TextForFilterRole = Qt.UserRole + 13
+KindRole = Qt.UserRole + 14
+IdRole = Qt.UserRole + 15
@@ -1 +1,2 @@
-from .connection import connect
+from .connection import connect, disconnect, shutdown, ConnectionManager
+from .migration import migrate, optimize, schemaVersion
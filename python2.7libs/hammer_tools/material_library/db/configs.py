@@ -6,3 +6,5 @@ try:
     DB_FILE_PATH = os.environ['HAMMER_MATERIAL_LIB_DB_PATH']
 except KeyError:
     DB_FILE_PATH = os.path.join(hou.homeHoudiniDirectory(), 'hammer_material_lib.db')
+
+JOURNAL_MODE = os.environ.get('HAMMER_MATERIAL_LIB_DB_JOURNAL_MODE', 'WAL')
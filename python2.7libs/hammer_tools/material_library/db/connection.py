@@ -1,8 +1,17 @@
 import os
 import sqlite3
+import threading
+import weakref
 
-from .configs import DB_FILE_PATH
+from .configs import DB_FILE_PATH, JOURNAL_MODE
 from .create import createDatabase
+from .migration import migrate
+
+CACHE_SIZE_KIB = 32 * 1024
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Another process may hold the write lock while it upgrades a large database
+MIGRATION_BUSY_TIMEOUT_MS = 10 * 60 * 1000
 
 
 class RowFactory(sqlite3.Row):
@@ -13,12 +22,143 @@ class RowFactory(sqlite3.Row):
             return default
 
 
+class Connection(object):
+    __slots__ = ('_connection', '_depth', '__weakref__')
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._depth = 0
+
+    def __getattr__(self, attr_name):
+        return getattr(self._connection, attr_name)
+
+    def __enter__(self):
+        if self._depth == 0:
+            self._connection.execute('BEGIN')
+        else:
+            self._connection.execute('SAVEPOINT level_{}'.format(self._depth))
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._depth -= 1
+        if self._depth == 0:
+            if exc_type is None:
+                self._connection.execute('COMMIT')
+            else:
+                self._connection.execute('ROLLBACK')
+        else:
+            savepoint = 'level_{}'.format(self._depth)
+            if exc_type is not None:
+                self._connection.execute('ROLLBACK TO ' + savepoint)
+            self._connection.execute('RELEASE ' + savepoint)
+        return False
+
+    def inTransaction(self):
+        return self._depth > 0
+
+    def commit(self):
+        # Inside a scoped transaction the outermost "with" block decides
+        if self._depth == 0:
+            self._connection.commit()
+
+    def rollback(self):
+        if self._depth == 0:
+            self._connection.rollback()
+
+    def close(self):
+        # Connections are owned by the manager, see ConnectionManager.shutdown()
+        pass
+
+
+class ConnectionManager(object):
+    def __init__(self, file_path):
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        # Each thread keeps its connection in a thread local, which is released when the thread ends,
+        # so pool threads do not leave open connections and new threads never get the one of a dead thread
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        self._generation = 0
+        self._prepared = False
+
+    def filePath(self):
+        return self._file_path
+
+    def _prepare(self):
+        with self._lock:
+            if self._prepared:
+                return
+
+            if not os.path.exists(self._file_path):
+                createDatabase(self._file_path)
+
+            connection = self._open()
+            connection.execute('PRAGMA busy_timeout = {}'.format(MIGRATION_BUSY_TIMEOUT_MS))
+            connection.execute('PRAGMA journal_mode = {}'.format(JOURNAL_MODE))
+            migrate(connection)
+            connection._connection.close()
+
+            self._prepared = True
+
+    def _open(self):
+        connection = sqlite3.connect(self._file_path,
+                                     detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+                                     isolation_level=None,
+                                     check_same_thread=False)
+        connection.row_factory = RowFactory
+        connection.execute('PRAGMA foreign_keys = ON')
+        connection.execute('PRAGMA synchronous = NORMAL')
+        connection.execute('PRAGMA cache_size = -{}'.format(CACHE_SIZE_KIB))
+        connection.execute('PRAGMA mmap_size = {}'.format(MMAP_SIZE))
+        connection.execute('PRAGMA temp_store = MEMORY')
+        return Connection(connection)
+
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # Connections opened before the last shutdown() are closed already
+        if connection is not None and self._local.generation == self._generation:
+            return connection
+
+        self._prepare()
+        connection = self._open()
+        with self._lock:
+            self._connections.add(connection)
+            self._local.generation = self._generation
+        self._local.connection = connection
+        return connection
+
+    def closeConnection(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is None:
+            return
+
+        with self._lock:
+            self._connections.discard(connection)
+        connection._connection.close()
+
+    def shutdown(self):
+        with self._lock:
+            connections = tuple(self._connections)
+            self._connections.clear()
+            self._generation += 1
+            self._prepared = False
+
+        for connection in connections:
+            connection._connection.close()
+
+
+CONNECTION_MANAGER = ConnectionManager(DB_FILE_PATH)
+
+
 def connect():
-    if not os.path.exists(DB_FILE_PATH):
-        createDatabase(DB_FILE_PATH)
-
-    connection = sqlite3.connect(DB_FILE_PATH,
-                                 detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
-    connection.row_factory = RowFactory
-    connection.execute('PRAGMA foreign_keys = ON')
-    return connection
+    return CONNECTION_MANAGER.connection()
+
+
+def disconnect():
+    CONNECTION_MANAGER.closeConnection()
+
+
+def shutdown():
+    CONNECTION_MANAGER.shutdown()
@@ -0,0 +1,183 @@
+import sqlite3
+
+
+MIGRATIONS = {}
+
+
+def migration(version):
+    def register(func):
+        if version in MIGRATIONS:
+            raise ValueError('Migration {} is already registered.'.format(version))
+        MIGRATIONS[version] = func
+        return func
+
+    return register
+
+
+def schemaVersion(connection):
+    return connection.execute('PRAGMA user_version').fetchone()[0]
+
+
+def latestSchemaVersion():
+    return max(MIGRATIONS) if MIGRATIONS else 0
+
+
+def migrate(connection):
+    current_version = schemaVersion(connection)
+    for version in sorted(MIGRATIONS):
+        if version <= current_version:
+            continue
+
+        # Other processes may upgrade the same database at the same time, so the version is read again
+        # after the write lock is taken and steps that were applied meanwhile are skipped
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            current_version = schemaVersion(connection)
+            if version > current_version:
+                MIGRATIONS[version](connection)
+                connection.execute('PRAGMA user_version = {}'.format(version))
+                current_version = version
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+    return current_version
+
+
+def optimize(connection, analyze=True, vacuum=False):
+    if connection.inTransaction():
+        raise RuntimeError('Database cannot be optimized inside a transaction.')
+
+    if analyze:
+        connection.execute('ANALYZE')
+    if vacuum:
+        connection.execute('VACUUM')
+    connection.execute('PRAGMA optimize')
+
+
+@migration(1)
+def addReverseLookupIndexes(connection):
+    connection.execute('CREATE INDEX IF NOT EXISTS material_library_library_id '
+                       'ON material_library (library_id)')
+    connection.execute('CREATE INDEX IF NOT EXISTS texture_library_library_id '
+                       'ON texture_library (library_id)')
+    connection.execute('CREATE INDEX IF NOT EXISTS texture_material_material_id '
+                       'ON texture_material (material_id)')
+    connection.execute('CREATE INDEX IF NOT EXISTS material_thumbnail_engine_id '
+                       'ON material_thumbnail (engine_id)')
+
+
+@migration(2)
+def addSearchIndex(connection):
+    # Row ids are "item_id * 2 + kind" so that triggers can address rows without a scan
+    try:
+        connection.execute("CREATE VIRTUAL TABLE item_search USING fts5(name, comment, path, prefix='2 3')")
+    except sqlite3.OperationalError:  # SQLite built without FTS5, search falls back to fuzzy matching
+        return
+
+    for table, kind in (('material', 0), ('texture', 1)):
+        connection.execute('INSERT INTO item_search (rowid, name, comment, path) '
+                           'SELECT id * 2 + {kind}, name, comment, path FROM {table}'
+                           .format(table=table, kind=kind))
+        connection.execute('CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN '
+                           'DELETE FROM item_search WHERE rowid = new.id * 2 + {kind}; '
+                           'INSERT INTO item_search (rowid, name, comment, path) '
+                           'VALUES (new.id * 2 + {kind}, new.name, new.comment, new.path); '
+                           'END'.format(table=table, kind=kind))
+        connection.execute('CREATE TRIGGER {table}_search_update AFTER UPDATE OF name, comment, path ON {table} '
+                           'BEGIN '
+                           'UPDATE item_search SET name = new.name, comment = new.comment, path = new.path '
+                           'WHERE rowid = old.id * 2 + {kind}; '
+                           'END'.format(table=table, kind=kind))
+        connection.execute('CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN '
+                           'DELETE FROM item_search WHERE rowid = old.id * 2 + {kind}; '
+                           'END'.format(table=table, kind=kind))
+
+
+@migration(3)
+def moveTextureThumbnails(connection):
+    # Listing textures should never read image bytes
+    connection.execute('CREATE TABLE texture_thumbnail ('
+                       'texture_id INTEGER PRIMARY KEY NOT NULL, '
+                       'image BLOB NOT NULL, '
+                       'FOREIGN KEY (texture_id) REFERENCES texture(id) ON DELETE CASCADE)')
+    connection.execute('INSERT INTO texture_thumbnail (texture_id, image) '
+                       'SELECT id, thumbnail FROM texture WHERE thumbnail IS NOT NULL')
+    connection.execute('UPDATE texture SET thumbnail = NULL WHERE thumbnail IS NOT NULL')
+
+
+@migration(4)
+def addThumbnailLevels(connection):
+    from ..image import imageToBytes, thumbnailPyramid
+    from ..thumbnail_cache import THUMBNAIL_SIZE
+
+    try:
+        from PyQt5.QtGui import QImage
+    except ImportError:
+        from PySide2.QtGui import QImage
+
+    def pyramid(data):
+        image = QImage.fromData(bytes(data), 'png')
+        if image.isNull():  # Keep undecodable data as is
+            return ((THUMBNAIL_SIZE, data),)
+        return tuple((size, sqlite3.Binary(imageToBytes(level))) for size, level in thumbnailPyramid(image))
+
+    connection.execute('CREATE TABLE material_thumbnail_level ('
+                       'material_id INTEGER NOT NULL, '
+                       'engine_id TEXT NOT NULL, '
+                       'size INTEGER NOT NULL, '
+                       'image BLOB NOT NULL, '
+                       'PRIMARY KEY (material_id, engine_id, size), '
+                       'FOREIGN KEY (material_id) REFERENCES material(id) ON DELETE CASCADE)')
+    for row in connection.execute('SELECT material_id, engine_id, image FROM material_thumbnail'):
+        connection.executemany('INSERT INTO material_thumbnail_level (material_id, engine_id, size, image) '
+                               'VALUES (?, ?, ?, ?)',
+                               ((row[0], row[1], size, image) for size, image in pyramid(row[2])))
+    connection.execute('DROP TABLE material_thumbnail')
+    connection.execute('ALTER TABLE material_thumbnail_level RENAME TO material_thumbnail')
+    connection.execute('CREATE INDEX material_thumbnail_engine_id ON material_thumbnail (engine_id)')
+
+    connection.execute('CREATE TABLE texture_thumbnail_level ('
+                       'texture_id INTEGER NOT NULL, '
+                       'size INTEGER NOT NULL, '
+                       'image BLOB NOT NULL, '
+                       'PRIMARY KEY (texture_id, size), '
+                       'FOREIGN KEY (texture_id) REFERENCES texture(id) ON DELETE CASCADE)')
+    for row in connection.execute('SELECT texture_id, image FROM texture_thumbnail'):
+        connection.executemany('INSERT INTO texture_thumbnail_level (texture_id, size, image) VALUES (?, ?, ?)',
+                               ((row[0], size, image) for size, image in pyramid(row[1])))
+    connection.execute('DROP TABLE texture_thumbnail')
+    connection.execute('ALTER TABLE texture_thumbnail_level RENAME TO texture_thumbnail')
+
+
+@migration(5)
+def addLibraryFolders(connection):
+    # Signatures of the folders seen by the last sync, unchanged folders are not listed again
+    connection.execute('CREATE TABLE library_folder ('
+                       'library_id INTEGER NOT NULL, '
+                       'path TEXT NOT NULL, '
+                       'mtime REAL NOT NULL, '
+                       'size INTEGER NOT NULL, '
+                       'inode INTEGER NOT NULL, '
+                       'PRIMARY KEY (library_id, path), '
+                       'FOREIGN KEY (library_id) REFERENCES library(id) ON DELETE CASCADE)')
+
+
+@migration(6)
+def addTextureSets(connection):
+    # Texture files of material folders grouped by name, valid while the folder mtime is the same
+    connection.execute('CREATE TABLE texture_set ('
+                       'path TEXT PRIMARY KEY NOT NULL, '
+                       'mtime REAL NOT NULL, '
+                       'files TEXT NOT NULL)')
+
+
+@migration(7)
+def addThumbnailHashes(connection):
+    # Hash of everything a rendered thumbnail depends on, thumbnails with the same hash are not rendered again
+    connection.execute('CREATE TABLE material_thumbnail_hash ('
+                       'material_id INTEGER NOT NULL, '
+                       'engine_id TEXT NOT NULL, '
+                       'hash TEXT NOT NULL, '
+                       'PRIMARY KEY (material_id, engine_id), '
+                       'FOREIGN KEY (material_id) REFERENCES material(id) ON DELETE CASCADE)')
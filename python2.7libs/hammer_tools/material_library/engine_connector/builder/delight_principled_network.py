@@ -56,16 +56,18 @@ class DelightPrincipledBuilder(MaterialBuilder):
             MapType.Displacement: self.output_node.inputIndex('Displacement')
         }
 
+    def canUseTemplates(self):
+        return True
+
     def cleanup(self):
-        self.network_node.layoutChildren()
+        self.layoutNetwork()
 
     def __addTexture(self, texture_map=None, name=None, connect_to='shader', linear=True):
         texture_map = texture_map or self.current_map
         name = '_'.join(alphaNumericTokens(name or texture_map.name()))
 
         texture_node = self.network_node.createNode('3Delight::dlTexture', name)
-        tex_map_path = texture_map.path(engine=self.engine)
-        texture_node.parm('textureFile').set(tex_map_path)
+        self.setMapParm(texture_node.parm('textureFile'))
 
         if linear:
             texture_node.parm('textureFile_meta_colorspace').set('linear')
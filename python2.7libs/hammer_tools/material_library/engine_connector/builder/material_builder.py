@@ -1,10 +1,13 @@
+import math
+
 import hou
 
 from ... import ui
 from ...text import alphaNumericTokens
 from ...map_type import MapType
 
-DEFAULT_BUILDER_ICON = ui.icon('MISC_empty', 16)
+# Distance between the material nodes created by a batch build, in network units
+BATCH_NODE_SPACING = 3.0
 
 
 class MaterialBuilder(object):
@@ -18,6 +21,11 @@ class MaterialBuilder(object):
         self.output_node = None
         self.shader_node = None
         self.current_map = None
+        self.current_map_index = None
+        self.map_paths = {}
+        self.map_parms = []
+        self._deferred_layouts = None
+        self._templates = None
 
     def build(self, material, root, name=None, options=None):
         self.material = material
@@ -29,6 +37,20 @@ class MaterialBuilder(object):
         else:
             self.root_node = hou.node(root)
 
+        # Each map is resolved once, even if the builder asks for its path more than once
+        self.map_paths = {}
+        textures = self.material.textures()
+
+        template_key = None
+        if self._templates is not None and self.canUseTemplates():
+            map_types = tuple(tex_map.type() for tex_map in textures)
+            template_key = (self.id(), map_types, repr(sorted(self.options.items())))
+            template = self._templates.get(template_key)
+            if template is not None:
+                return self.buildFromTemplate(template, textures)
+
+        self.map_parms = []
+        self.network_node = None
         try:
             self.network_node = self.createNetwork()
         except NotImplementedError:
@@ -41,8 +63,9 @@ class MaterialBuilder(object):
         except NotImplementedError:
             pass
 
-        for tex_map in self.material.textures():
+        for index, tex_map in enumerate(textures):
             self.current_map = tex_map
+            self.current_map_index = index
             method = {
                 MapType.Unknown: lambda: None,
                 MapType.Thumbnail: lambda: None,
@@ -70,7 +93,97 @@ class MaterialBuilder(object):
         except NotImplementedError:
             pass
 
-        return self.network_node or self.shader_node
+        node = self.network_node or self.shader_node
+        if template_key is not None:
+            self._templates[template_key] = (node, self.network_node is not None, tuple(textures),
+                                             tuple(self.map_parms))
+        return node
+
+    def buildFromTemplate(self, template, textures):
+        source_node, is_network, source_textures, map_parms = template
+        node = self.root_node.copyItems((source_node,))[0]
+        node.setName(self.material_name, unique_name=True)
+        self.network_node = node if is_network else None
+        self.shader_node = None if is_network else node
+
+        # Parms are looked up before any node is renamed, their relative paths refer to the template
+        parms = [(node.parm(parm_path), index, transform) for parm_path, index, transform in map_parms]
+        for parm, index, transform in parms:
+            self.current_map = textures[index]
+            path = self.mapPath()
+            parm.set(transform(path) if transform is not None else path)
+
+            # Nodes named after the template textures get the names of the new ones
+            map_node = parm.node()
+            if map_node != node and map_node.name() == '_'.join(alphaNumericTokens(source_textures[index].name())):
+                map_node.setName('_'.join(alphaNumericTokens(textures[index].name())), unique_name=True)
+
+        if is_network:
+            self.layoutNetwork()
+        return node
+
+    def buildMany(self, materials, root, options=None):
+        if not isinstance(root, hou.Node):
+            root = hou.node(root)
+
+        nodes = []
+        self._deferred_layouts = []
+        # Materials with the same maps are copied from the first one built and only their paths are changed
+        self._templates = {}
+        try:
+            with hou.undos.group('Build Materials'):
+                for material in materials:
+                    nodes.append(self.build(material, root, options=options))
+
+                for network_node in self._deferred_layouts:
+                    network_node.layoutChildren()
+                self.placeNodes(nodes)
+        finally:
+            self._deferred_layouts = None
+            self._templates = None
+        return tuple(nodes)
+
+    @staticmethod
+    def placeNodes(nodes):
+        if not nodes:
+            return
+
+        # Only the first node searches for a free place, the others are put on a grid next to it
+        nodes[0].moveToGoodPosition()
+        origin = nodes[0].position()
+        columns = int(math.ceil(math.sqrt(len(nodes))))
+        for index, node in enumerate(nodes[1:], 1):
+            row, column = divmod(index, columns)
+            node.setPosition(origin + hou.Vector2(column * BATCH_NODE_SPACING, -row * BATCH_NODE_SPACING))
+
+    def mapPath(self, texture_map=None):
+        texture_map = texture_map or self.current_map
+        path = self.map_paths.get(texture_map.name())
+        if path is None:
+            path = texture_map.path(engine=self.engine)
+            self.map_paths[texture_map.name()] = path
+        return path
+
+    def setMapParm(self, parm, transform=None):
+        path = self.mapPath()
+        parm.set(transform(path) if transform is not None else path)
+
+        root_path = (self.network_node or self.shader_node).path()
+        node_path = parm.node().path()
+        if node_path == root_path:
+            parm_path = parm.name()
+        else:
+            parm_path = node_path[len(root_path) + 1:] + '/' + parm.name()
+        self.map_parms.append((parm_path, self.current_map_index, transform))
+
+    def canUseTemplates(self):
+        return False
+
+    def layoutNetwork(self):
+        if self._deferred_layouts is not None:
+            self._deferred_layouts.append(self.network_node)
+        else:
+            self.network_node.layoutChildren()
 
     def id(self):
         raise NotImplementedError
@@ -86,7 +199,7 @@ class MaterialBuilder(object):
 
     @staticmethod
     def icon():
-        return DEFAULT_BUILDER_ICON
+        return ui.cachedIcon('MISC_empty', 16)
 
     @staticmethod
     def buildOptionsWidget():
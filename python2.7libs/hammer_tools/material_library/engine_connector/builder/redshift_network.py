@@ -46,21 +46,24 @@ class RedshiftNetworkBuilder(MaterialBuilder):
             MapType.AmbientOcclusion: self.shader_node.inputIndex('diffuse_weight')
         }
 
+    def canUseTemplates(self):
+        return True
+
     def cleanup(self):
-        self.network_node.layoutChildren()
+        self.layoutNetwork()
 
     def __addTexture(self, texture_map=None, name=None, connect_to='shader', linear=True):
         texture_map = texture_map or self.current_map
         name = '_'.join(alphaNumericTokens(name or texture_map.name()))
 
         texture_node = self.network_node.createNode('redshift::TextureSampler', name)
-        tex_map_path = texture_map.path(engine=self.engine)
         uv_mode = self.options.get('uv_mode')
         if uv_mode == 'udim':
-            tex_map_path = replaceUDIM(tex_map_path, '<UDIM>')
+            self.setMapParm(texture_node.parm('tex0'), lambda path: replaceUDIM(path, '<UDIM>'))
         elif uv_mode == 'uvtile':
-            tex_map_path = replaceUVTile(tex_map_path, '<UVTILE>')
-        texture_node.parm('tex0').set(tex_map_path)
+            self.setMapParm(texture_node.parm('tex0'), lambda path: replaceUVTile(path, '<UVTILE>'))
+        else:
+            self.setMapParm(texture_node.parm('tex0'))
         try:  # Fixme: Quick fix for Redshift 3.0.49+
             texture_node.parm('tex0_gammaoverride').set(linear)
         except AttributeError:
@@ -169,7 +172,7 @@ class RedshiftNetworkBuilder(MaterialBuilder):
     def addOpacity(self):
         if self.options.get('use_sprite'):
             sprite_node = self.network_node.createNode('redshift::Sprite')
-            sprite_node.parm('tex0').set(self.current_map.path(engine=self.engine))
+            self.setMapParm(sprite_node.parm('tex0'))
             sprite_node.parm('tex0_gammaoverride').set(True)
 
             if self.shader_node.outputConnections():
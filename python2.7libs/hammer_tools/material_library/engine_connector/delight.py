@@ -5,7 +5,6 @@ import hou
 
 from .. import ui
 from ..image import loadImage
-from ..path import TEMP_IMAGE_PATH
 from ..texture_format import TextureFormat
 from ..thumbnail import MaterialPreviewScene
 from .engine_connector import EngineConnector
@@ -42,7 +41,7 @@ class DelightConnector(EngineConnector):
     def canCreateThumbnail(self):
         return True
 
-    def createThumbnail(self, material, options=None):
+    def createThumbnailScene(self, options=None):
         scene = MaterialPreviewScene(None)
 
         scene.render_node = scene.out_node.createNode('3Delight')
@@ -61,23 +60,26 @@ class DelightConnector(EngineConnector):
         scene.render_node.parm('objects_to_render').set(scene.geo_node.path())
         scene.render_node.parm('lights_to_render').set(scene.env_node.path())
 
-        builder = DelightPrincipledBuilder(self)
-        scene.material_node = builder.build(material, '/mat/')
-        scene.geo_node.parm('shop_materialpath').set(scene.material_node.path())
-
-        scene.render_node.parm('default_image_filename').set(TEMP_IMAGE_PATH)
         scene.render_node.parm('default_image_format').set('png')
         # scene.render_node.parm('default_image_bits').set('uint8')
+        return scene
+
+    def thumbnailBuilder(self):
+        return DelightPrincipledBuilder(self)
+
+    def renderThumbnail(self, scene, material, options=None):
+        scene.setMaterialNode(self.thumbnailBuilder().build(material, '/mat/'))
+
+        scene.render_node.parm('default_image_filename').set(scene.image_path)
         scene.render_node.parm('execute').pressButton()
 
-        output_path = TEMP_IMAGE_PATH.replace('.png', '_rgba.png')
+        output_path = scene.image_path.replace('.png', '_rgba.png')
         image = None
         start_time = time.time()
         while image is None and time.time() - start_time < 30:
             time.sleep(4.5)
             image = loadImage(output_path)
         os.remove(output_path)
-        scene.destroy()
         return image
 
     def supportedTextureFormats(self):
@@ -2,8 +2,6 @@ import hou
 
 from .. import ui
 
-DEFAULT_ENGINE_ICON = ui.icon('COMMON_engine', 16)
-
 
 class EngineConnector(object):
     __engines = []
@@ -55,7 +53,7 @@ class EngineConnector(object):
 
     @staticmethod
     def icon():
-        return DEFAULT_ENGINE_ICON
+        return ui.cachedIcon('COMMON_engine', 16)
 
     def nodeTypeAssociatedWithEngine(self, node_type):
         raise NotImplementedError
@@ -64,12 +62,44 @@ class EngineConnector(object):
     def builders():
         return ()
 
+    def buildMaterials(self, materials, root, builder=None, options=None):
+        if builder is None:
+            builders = self.builders()
+            if not builders:
+                return ()
+            builder = builders[0]
+        return builder.buildMany(materials, root, options=options)
+
     def canCreateThumbnail(self):
         return False
 
-    def createThumbnail(self, material, options=None):
+    def thumbnailBuilder(self):
+        return
+
+    def createThumbnailScene(self, options=None):
         raise NotImplementedError
 
+    def renderThumbnail(self, scene, material, options=None):
+        raise NotImplementedError
+
+    def createThumbnail(self, material, options=None):
+        scene = self.createThumbnailScene(options)
+        try:
+            return self.renderThumbnail(scene, material, options)
+        finally:
+            scene.destroy()
+
+    def createThumbnails(self, materials, options=None, image_path=None):
+        # The preview scene and the render node are created once for all the materials
+        scene = self.createThumbnailScene(options)
+        if image_path is not None:
+            scene.image_path = image_path
+        try:
+            for material in materials:
+                yield material, self.renderThumbnail(scene, material, options)
+        finally:
+            scene.destroy()
+
     def supportedTextureFormats(self):
         raise NotImplementedError
 
@@ -4,7 +4,6 @@ import hou
 
 from .. import ui
 from ..image import loadImage
-from ..path import TEMP_IMAGE_PATH
 from ..texture_format import TextureFormat
 from ..thumbnail import MaterialPreviewScene
 from .engine_connector import EngineConnector
@@ -44,7 +43,7 @@ class MantraConnector(EngineConnector):
     def canCreateThumbnail(self):
         return True
 
-    def createThumbnail(self, material, options=None):
+    def createThumbnailScene(self, options=None):
         scene = MaterialPreviewScene()
 
         scene.render_node = scene.out_node.createNode('ifd')
@@ -69,17 +68,19 @@ class MantraConnector(EngineConnector):
         scene.render_node.parm('vm_usemaxthreads').set(2)  # All threads except one
         scene.render_node.parm('vm_writecheckpoint').set(False)
         scene.render_node.parm('soho_foreground').set(True)
+        return scene
 
-        builder = MantraPrincipledBuilder(self)
-        scene.material_node = builder.build(material, '/mat/')
-        scene.geo_node.parm('shop_materialpath').set(scene.material_node.path())
+    def thumbnailBuilder(self):
+        return MantraPrincipledBuilder(self)
 
-        scene.render_node.parm('vm_picture').set(TEMP_IMAGE_PATH)
+    def renderThumbnail(self, scene, material, options=None):
+        scene.setMaterialNode(self.thumbnailBuilder().build(material, '/mat/'))
+
+        scene.render_node.parm('vm_picture').set(scene.image_path)
         scene.render_node.parm('execute').pressButton()
 
-        image = loadImage(TEMP_IMAGE_PATH)
-        os.remove(TEMP_IMAGE_PATH)
-        scene.destroy()
+        image = loadImage(scene.image_path)
+        os.remove(scene.image_path)
         return image
 
     def supportedTextureFormats(self):
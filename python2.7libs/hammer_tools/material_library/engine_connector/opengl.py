@@ -4,7 +4,6 @@ import hou
 
 from .. import ui
 from ..image import loadImage
-from ..path import TEMP_IMAGE_PATH
 from ..texture_format import TextureFormat
 from ..thumbnail import MaterialPreviewScene
 from .engine_connector import EngineConnector
@@ -33,7 +32,7 @@ class OpenGLConnector(EngineConnector):
     def canCreateThumbnail(self):
         return True
 
-    def createThumbnail(self, material, options):
+    def createThumbnailScene(self, options=None):
         scene = MaterialPreviewScene()
 
         scene.render_node = scene.out_node.createNode('opengl')
@@ -52,10 +51,13 @@ class OpenGLConnector(EngineConnector):
         scene.render_node.parm('lightsamples').set(64)
         scene.render_node.parm('shadows').set(False)
         scene.render_node.parm('reflection').set(True)
+        return scene
 
-        builder = MantraPrincipledBuilder(self)
-        scene.material_node = builder.build(material, '/mat/')
-        scene.geo_node.parm('shop_materialpath').set(scene.material_node.path())
+    def thumbnailBuilder(self):
+        return MantraPrincipledBuilder(self)
+
+    def renderThumbnail(self, scene, material, options=None):
+        scene.setMaterialNode(self.thumbnailBuilder().build(material, '/mat/'))
 
         # Fix for metallic materials in 18.0
         major_version, minor_version, build_version = hou.applicationVersion()
@@ -67,13 +69,12 @@ class OpenGLConnector(EngineConnector):
                 scene.material_node.parm('reflect_useTexture').eval()
             )
 
-        scene.render_node.parm('picture').set(TEMP_IMAGE_PATH)
+        scene.render_node.parm('picture').set(scene.image_path)
         scene.render_node.parm('execute').pressButton()
 
-        image = loadImage(TEMP_IMAGE_PATH)
-        os.remove(TEMP_IMAGE_PATH)
+        image = loadImage(scene.image_path)
+        os.remove(scene.image_path)
         hou.hscript('glcache -c')
-        scene.destroy()
         return image
 
     def supportedTextureFormats(self):
@@ -4,7 +4,6 @@ import hou
 
 from .. import ui
 from ..image import loadImage
-from ..path import TEMP_IMAGE_PATH
 from ..texture_format import TextureFormat
 from .engine_connector import EngineConnector
 from .builder import RedshiftNetworkBuilder
@@ -48,7 +47,7 @@ class RedshiftConnector(EngineConnector):
     def canCreateThumbnail(self):
         return True
 
-    def createThumbnail(self, material, options=None):
+    def createThumbnailScene(self, options=None):
         scene = MaterialPreviewScene()
 
         displace_enable_parm = scene.geo_node.parm('RS_objprop_displace_enable')
@@ -90,17 +89,19 @@ class RedshiftConnector(EngineConnector):
         scene.render_node.parm('SecondaryGIEngine').set('RS_GIENGINE_BRUTE_FORCE')
         scene.render_node.parm('NumGIBounces').set(3)
         # Todo: RTX and others new features
+        return scene
 
-        builder = RedshiftNetworkBuilder(self)
-        scene.material_node = builder.build(material, '/mat/')
-        scene.geo_node.parm('shop_materialpath').set(scene.material_node.path())
+    def thumbnailBuilder(self):
+        return RedshiftNetworkBuilder(self)
 
-        scene.render_node.parm('RS_outputFileNamePrefix').set(TEMP_IMAGE_PATH)
+    def renderThumbnail(self, scene, material, options=None):
+        scene.setMaterialNode(self.thumbnailBuilder().build(material, '/mat/'))
+
+        scene.render_node.parm('RS_outputFileNamePrefix').set(scene.image_path)
         scene.render_node.parm('execute').pressButton()
 
-        image = loadImage(TEMP_IMAGE_PATH)
-        os.remove(TEMP_IMAGE_PATH)
-        scene.destroy()
+        image = loadImage(scene.image_path)
+        os.remove(scene.image_path)
         return image
 
     def supportedTextureFormats(self):
@@ -4,12 +4,24 @@ import tempfile
 
 try:
     from PyQt5.QtCore import QBuffer, QIODevice, Qt
-    from PyQt5.QtGui import QImage
+    from PyQt5.QtGui import QImage, QImageReader
 except ImportError:
     from PySide2.QtCore import QBuffer, QIODevice, Qt
-    from PySide2.QtGui import QImage
+    from PySide2.QtGui import QImage, QImageReader
+
+try:
+    import OpenImageIO
+except ImportError:
+    OpenImageIO = None
 
 from .texture_format import TextureFormat
+from .thumbnail_cache import THUMBNAIL_LEVELS
+
+# Decoded by Qt itself, JPEG is downscaled by the decoder
+QT_IMAGE_FORMATS = {'png', 'bmp', 'tga', 'tif', 'tiff', 'jpg', 'jpeg'}
+
+# May contain mip levels, the smallest level that still covers the requested size is read
+MIP_IMAGE_FORMATS = {'exr', 'tx'}
 
 
 def imageToBytes(image):
@@ -21,19 +33,87 @@ def imageToBytes(image):
     return data
 
 
+def thumbnailPyramid(image):
+    size = max(image.width(), image.height())
+    if size > THUMBNAIL_LEVELS[-1]:
+        size = THUMBNAIL_LEVELS[-1]
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    levels = [(size, image)]
+    for level in reversed(THUMBNAIL_LEVELS):
+        if level < size:
+            # Each level is scaled from the previous one, which is cheaper and looks the same
+            image = image.scaled(level, level, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            levels.append((level, image))
+    return levels
+
+
+def thumbnailPyramidData(image):
+    return tuple((size, imageToBytes(level)) for size, level in thumbnailPyramid(image))
+
+
 def loadImage(path):
     tex_format = TextureFormat(path)
-    if tex_format in {'png', 'bmp', 'tga', 'tif', 'tiff', 'jpg', 'jpeg'}:
+    if tex_format in QT_IMAGE_FORMATS:
         image = QImage(path)
         if not image.isNull():
             return image
         else:
             return
 
-    temp_path = os.path.join(tempfile.gettempdir(), str(os.getpid()) + 'hammer_temp_image.png')
-    temp_path = temp_path.replace('\\', '/')
-    subprocess.call('iconvert -g off "{0}" "{1}"'.format(path, temp_path))
-    if os.path.exists(temp_path):
+    # Every call gets its own file, so conversions may run in parallel
+    handle, temp_path = tempfile.mkstemp(prefix='hammer_temp_image', suffix='.png')
+    os.close(handle)
+    try:
+        subprocess.call(['iconvert', '-g', 'off', path, temp_path])
         image = QImage(temp_path)
+    finally:
         os.remove(temp_path)
+    if not image.isNull():
         return image
+
+
+def readMipLevel(path, size):
+    image_input = OpenImageIO.ImageInput.open(path)
+    if not image_input:
+        return
+
+    try:
+        level = 0
+        spec = image_input.spec()
+        while image_input.seek_subimage(0, level + 1):
+            if max(image_input.spec().width, image_input.spec().height) < size:
+                break
+            level += 1
+            spec = image_input.spec()
+
+        channels = {1: 1, 2: 1, 3: 3}.get(spec.nchannels, 4)
+        pixels = image_input.read_image(0, level, 0, channels, 'uint8')
+    finally:
+        image_input.close()
+
+    if pixels is None:
+        return
+
+    image_format = {1: QImage.Format_Grayscale8, 3: QImage.Format_RGB888, 4: QImage.Format_RGBA8888}[channels]
+    # The copy owns its pixels, the array goes away with this function
+    return QImage(pixels.tobytes(), spec.width, spec.height, spec.width * channels, image_format).copy()
+
+
+def readScaledImage(path, size=THUMBNAIL_LEVELS[-1]):
+    tex_format = TextureFormat(path)
+    if tex_format in QT_IMAGE_FORMATS:
+        reader = QImageReader(path)
+        source_size = reader.size()
+        if source_size.isValid() and max(source_size.width(), source_size.height()) > size:
+            reader.setScaledSize(source_size.scaled(size, size, Qt.KeepAspectRatio))
+        image = reader.read()
+        if not image.isNull():
+            return image
+        return
+
+    if OpenImageIO is not None and tex_format in MIP_IMAGE_FORMATS:
+        image = readMipLevel(path, size)
+        if image is not None:
+            return image
+    return loadImage(path)
@@ -0,0 +1,364 @@
+import os
+import posixpath
+from collections import deque
+from functools import partial
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from time import time
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+import hou
+
+from .db import connect
+from .map_type import MapType
+from .operation import InterruptableOperation
+from .text import convertName, DEFAULT_NAMING_OPTIONS
+from .texture_format import TextureFormat
+
+BATCH_SIZE = 1000
+# Listing folders is mostly waiting for the file system, so it is worth more threads than cores
+WALK_THREAD_COUNT = min(32, cpu_count() * 2)
+PROGRESS_INTERVAL = 0.1
+
+
+def normalizePath(path):
+    return path.replace('\\', '/').rstrip('/') or '/'
+
+
+def listDirectory(path):
+    dirs = []
+    files = []
+    try:
+        if scandir is not None:
+            for entry in scandir(path):
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        dirs.append(normalizePath(entry.path))
+                else:
+                    files.append(entry.name)
+        else:
+            for name in os.listdir(path):
+                entry_path = os.path.join(path, name)
+                if os.path.isdir(entry_path):
+                    if not os.path.islink(entry_path):
+                        dirs.append(normalizePath(entry_path))
+                else:
+                    files.append(name)
+    except OSError:  # Unreadable folders are skipped, as os.walk does
+        pass
+    return dirs, files
+
+
+def folderSignature(path):
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size, stat.st_ino
+
+
+def scanDirectory(path, classify):
+    dirs, files = listDirectory(path)
+    return dirs, classify(path, files)
+
+
+def walkFolder(path, scan, pool):
+    pending = deque([pool.apply_async(scan, (normalizePath(path),))])
+    while pending:
+        dirs, result = pending.popleft().get()
+        for dir_path in dirs:
+            pending.append(pool.apply_async(scan, (dir_path,)))
+        yield result
+
+
+def materialClassifier(naming_options=None, favorite=False, options=None):
+    from .material import Material
+
+    naming_options = naming_options or DEFAULT_NAMING_OPTIONS
+
+    def classify(root, files):
+        for map_type in MapType.classify(files):
+            if map_type not in {MapType.Unknown, MapType.Thumbnail}:
+                return [Material.fromData({
+                    'name': convertName(posixpath.basename(root), naming_options),
+                    'favorite': favorite,
+                    'options': options,
+                    'path': root
+                })]
+        return []
+
+    return classify
+
+
+def textureClassifier(naming_options=None, favorite=False, options=None):
+    from .engine_connector import EngineConnector
+    from .texture import Texture
+
+    naming_options = naming_options or DEFAULT_NAMING_OPTIONS
+    supported_texture_formats = {tex_format for engine in EngineConnector.engines()
+                                 for tex_format in engine.supportedTextureFormats()}
+    supported_extensions = {}
+
+    def isSupported(ext):
+        supported = supported_extensions.get(ext)
+        if supported is None:
+            supported = supported_extensions[ext] = TextureFormat(ext) in supported_texture_formats
+        return supported
+
+    def classify(root, files):
+        files = [file for file in files if isSupported(os.path.splitext(file)[1])]
+        textures = []
+        for file, map_type in zip(files, MapType.classify(files)):
+            if map_type == MapType.Unknown:
+                textures.append(Texture.fromData({
+                    'name': convertName(os.path.splitext(file)[0], naming_options),
+                    'favorite': favorite,
+                    'options': options,
+                    'path': root + '/' + file
+                }))
+        return textures
+
+    return classify
+
+
+def insertItems(connection, table, items, library=None):
+    if not items:
+        return []
+
+    # Ids are assigned up front, so that the rows can be inserted in one executemany call
+    first_id = connection.execute('SELECT coalesce(max(id), 0) + 1 FROM {}'.format(table)).fetchone()[0]
+    for item_id, item in enumerate(items, first_id):
+        item._id = item_id
+
+    connection.executemany('INSERT OR IGNORE INTO {} (id, name, comment, favorite, options, path) '
+                           'VALUES (:id, :name, :comment, :favorite, :options, :path)'.format(table),
+                           [item.asData() for item in items])
+
+    inserted_ids = {row[0] for row in connection.execute('SELECT id FROM {} WHERE id >= ? AND id < ?'.format(table),
+                                                         (first_id, first_id + len(items)))}
+    for item in items:
+        if item.id() not in inserted_ids:
+            # Conflicts with an existing item with the same path, which is linked to the library instead
+            row = connection.execute('SELECT id FROM {} WHERE path = ?'.format(table),
+                                     (item.asData()['path'],)).fetchone()
+            item._id = row[0] if row is not None else None
+    items = [item for item in items if item.id() is not None]
+
+    if library is not None:
+        connection.executemany('INSERT OR IGNORE INTO {}_library VALUES (?, ?)'.format(table),
+                               [(item.id(), library.id()) for item in items])
+    return items
+
+
+def insertItemsInBatches(connection, table, items, library=None):
+    added = []
+    for start in range(0, len(items), BATCH_SIZE):
+        with connection:
+            added.extend(insertItems(connection, table, items[start:start + BATCH_SIZE], library))
+    return added
+
+
+def ingestFolder(path, table, classify, library=None, operation='', icon='MISC_empty'):
+    # Labels are loaded once here instead of by every worker thread
+    MapType.labelIndex()
+
+    connection = connect()
+    added = []
+    batch = []
+    pool = ThreadPool(WALK_THREAD_COUNT)
+    try:
+        with InterruptableOperation(operation=operation, icon=icon, parent=hou.qt.mainWindow()) as progress:
+            scan = partial(scanDirectory, classify=classify)
+            last_update = 0
+            for folder_count, items in enumerate(walkFolder(path, scan, pool), 1):
+                batch.extend(items)
+                if len(batch) >= BATCH_SIZE:
+                    with connection:
+                        added.extend(insertItems(connection, table, batch, library))
+                    batch = []
+
+                if time() - last_update > PROGRESS_INTERVAL:
+                    progress.updateProgress(folder_count, 'Scanned {} folders, found {} items'
+                                            .format(folder_count, len(added) + len(batch)))
+                    last_update = time()
+
+            with connection:
+                added.extend(insertItems(connection, table, batch, library))
+    finally:
+        pool.terminate()
+    return tuple(added)
+
+
+def ingestMaterials(path, naming_options=None, library=None, favorite=False, options=None):
+    return ingestFolder(path, 'material', materialClassifier(naming_options, favorite, options), library,
+                        'Adding materials', 'SOP_material')
+
+
+def ingestTextures(path, naming_options=None, library=None, favorite=False, options=None):
+    return ingestFolder(path, 'texture', textureClassifier(naming_options, favorite, options), library,
+                        'Adding textures', 'BUTTONS_parmmenu_texture')
+
+
+def syncDirectory(path, manifest, children, classify):
+    try:
+        signature = folderSignature(path)
+    except OSError:
+        return (), (path, None, None)
+
+    if manifest.get(path) == signature:
+        return children.get(path, ()), (path, signature, None)
+
+    dirs, items = scanDirectory(path, classify)
+    return dirs, (path, signature, items)
+
+
+def libraryItemPaths(connection, table, library):
+    return {normalizePath(row['path']): row['id'] for row in connection.execute(
+        'SELECT id, path FROM {table} JOIN {table}_library ON {table}_library.{table}_id = {table}.id '
+        'WHERE {table}_library.library_id = :library_id'.format(table=table),
+        {'library_id': library.id()}
+    ) if row['path']}
+
+
+def moveLibraryItems(connection, table, library, old_path, new_path):
+    connection.execute('UPDATE {table} SET path = :new_path || substr(path, length(:old_path) + 1) '
+                       'WHERE (path = :old_path OR substr(path, 1, length(:old_path) + 1) = :old_path || \'/\') '
+                       'AND id IN (SELECT {table}_id FROM {table}_library WHERE library_id = :library_id)'
+                       .format(table=table),
+                       {'old_path': old_path, 'new_path': new_path, 'library_id': library.id()})
+
+
+def movedPath(path, moves):
+    for old_path, new_path in moves:
+        if path.startswith(old_path + '/'):
+            return new_path + path[len(old_path):]
+    return path
+
+
+def removeLibraryItems(connection, table, library, item_ids):
+    connection.executemany('DELETE FROM {table}_library WHERE {table}_id = ? AND library_id = ?'.format(table=table),
+                           [(item_id, library.id()) for item_id in item_ids])
+    # Items that belonged only to this library are gone from the disk
+    connection.executemany('DELETE FROM {table} WHERE id = ? AND NOT EXISTS '
+                           '(SELECT 1 FROM {table}_library WHERE {table}_id = ?)'.format(table=table),
+                           [(item_id, item_id) for item_id in item_ids])
+
+
+def syncLibrary(library, naming_options=None):
+    if not library.path() or not os.path.isdir(library.path()):
+        raise ValueError('Library folder does not exist.')
+
+    root = normalizePath(library.path())
+
+    MapType.labelIndex()
+    classify_materials = materialClassifier(naming_options)
+    classify_textures = textureClassifier(naming_options)
+
+    def classify(path, files):
+        return classify_materials(path, files), classify_textures(path, files)
+
+    connection = connect()
+    manifest = {row['path']: (row['mtime'], row['size'], row['inode']) for row in connection.execute(
+        'SELECT path, mtime, size, inode FROM library_folder WHERE library_id = :library_id',
+        {'library_id': library.id()}
+    )}
+    children = {}
+    for path in manifest:
+        if path != root:
+            children.setdefault(posixpath.dirname(path), []).append(path)
+
+    scanned = {}
+    changed = {}
+    completed = False
+    pool = ThreadPool(WALK_THREAD_COUNT)
+    try:
+        with InterruptableOperation(operation='Syncing library', icon='BUTTONS_import_library',
+                                    parent=hou.qt.mainWindow()) as progress:
+            scan = partial(syncDirectory, manifest=manifest, children=children, classify=classify)
+            last_update = 0
+            for folder_count, (path, signature, items) in enumerate(walkFolder(root, scan, pool), 1):
+                if signature is None:
+                    continue
+                scanned[path] = signature
+                if items is not None:
+                    changed[path] = items
+
+                if time() - last_update > PROGRESS_INTERVAL:
+                    progress.updateProgress(folder_count, 'Checked {} folders, {} changed'
+                                            .format(folder_count, len(changed)))
+                    last_update = time()
+            completed = True
+    finally:
+        pool.terminate()
+
+    if not completed:  # Folders that were not reached are not gone
+        return 0, 0, 0
+
+    vanished = set(manifest).difference(scanned)
+
+    # A vanished folder with the same inode as a new one was moved or renamed
+    new_by_inode = {scanned[path][2]: path for path in changed if path not in manifest and scanned[path][2]}
+    moves = [(path, new_by_inode[manifest[path][2]]) for path in sorted(vanished, key=len)
+             if manifest[path][2] in new_by_inode]
+    with connection:
+        for old_path, new_path in moves:
+            moveLibraryItems(connection, 'material', library, old_path, new_path)
+            moveLibraryItems(connection, 'texture', library, old_path, new_path)
+    vanished.difference_update(old_path for old_path, _ in moves)
+    # Items of the folders that vanished from a moved folder were moved along with it
+    gone = {movedPath(path, moves) for path in vanished}
+
+    materials = libraryItemPaths(connection, 'material', library)
+    textures = libraryItemPaths(connection, 'texture', library)
+    texture_folders = {}
+    for path, texture_id in textures.items():
+        texture_folders.setdefault(posixpath.dirname(path), {})[path] = texture_id
+
+    new_materials = []
+    new_textures = []
+    removed_materials = []
+    removed_textures = []
+    for path, (found_materials, found_textures) in changed.items():
+        if found_materials:
+            if path not in materials:
+                new_materials.extend(found_materials)
+        elif path in materials:
+            removed_materials.append(materials[path])
+
+        existing_textures = texture_folders.get(path, {})
+        found_paths = set()
+        for texture in found_textures:
+            texture_path = texture.asData()['path']
+            found_paths.add(texture_path)
+            if texture_path not in existing_textures:
+                new_textures.append(texture)
+        removed_textures.extend(texture_id for texture_path, texture_id in existing_textures.items()
+                                if texture_path not in found_paths)
+
+    for path in gone:
+        if path in materials:
+            removed_materials.append(materials[path])
+        removed_textures.extend(texture_folders.get(path, {}).values())
+
+    added_materials = insertItemsInBatches(connection, 'material', new_materials, library)
+    added_textures = insertItemsInBatches(connection, 'texture', new_textures, library)
+
+    with connection:
+        removeLibraryItems(connection, 'material', library, removed_materials)
+        removeLibraryItems(connection, 'texture', library, removed_textures)
+
+        connection.executemany('DELETE FROM library_folder WHERE library_id = ? AND path = ?',
+                               [(library.id(), path) for path in vanished])
+        connection.executemany('DELETE FROM library_folder WHERE library_id = ? AND path = ?',
+                               [(library.id(), old_path) for old_path, _ in moves])
+        connection.executemany('INSERT OR REPLACE INTO library_folder (library_id, path, mtime, size, inode) '
+                               'VALUES (?, ?, ?, ?, ?)',
+                               [(library.id(), path) + scanned[path] for path in changed])
+
+    return (len(added_materials) + len(added_textures),
+            len(moves),
+            len(removed_materials) + len(removed_textures))
@@ -0,0 +1,3 @@
+class ItemKind:
+    Material = 0
+    Texture = 1
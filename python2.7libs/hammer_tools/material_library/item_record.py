@@ -0,0 +1,46 @@
+from collections import namedtuple
+
+from .db import connect
+from .item_kind import ItemKind
+from .material import Material
+from .texture import Texture
+
+# Texture thumbnails do not depend on the rendering engine
+ANY_ENGINE = '*'
+
+ItemRecord = namedtuple('ItemRecord', ('kind', 'id', 'name', 'comment', 'favorite', 'path', 'thumbnail_engines'))
+
+MATERIAL_RECORDS_QUERY = (
+    'SELECT {kind} AS kind, material.id AS id, material.name AS name, material.comment AS comment, '
+    'material.favorite AS favorite, material.path AS path, '
+    "(SELECT group_concat(engine_id, ' ') FROM (SELECT DISTINCT engine_id FROM material_thumbnail "
+    'WHERE material_thumbnail.material_id = material.id)) AS thumbnail_engines '
+    'FROM material'
+).format(kind=ItemKind.Material)
+
+TEXTURE_RECORDS_QUERY = (
+    'SELECT {kind}, texture.id, texture.name, texture.comment, texture.favorite, texture.path, '
+    "CASE WHEN EXISTS (SELECT 1 FROM texture_thumbnail WHERE texture_thumbnail.texture_id = texture.id) "
+    "THEN '{any_engine}' END "
+    'FROM texture'
+).format(kind=ItemKind.Texture, any_engine=ANY_ENGINE)
+
+
+def recordFromRow(row):
+    thumbnail_engines = row['thumbnail_engines']
+    return ItemRecord(row['kind'], row['id'], row['name'], row['comment'], bool(row['favorite']), row['path'],
+                      tuple(thumbnail_engines.split(' ')) if thumbnail_engines else ())
+
+
+def fetchItemRecords(material_clause='', texture_clause='', parameters=None):
+    connection = connect()
+    cursor = connection.execute(' '.join((MATERIAL_RECORDS_QUERY, material_clause, 'UNION ALL',
+                                          TEXTURE_RECORDS_QUERY, texture_clause)),
+                                parameters or {})
+    return tuple(recordFromRow(row) for row in cursor.fetchall())
+
+
+def itemFromRecord(record):
+    if record.kind == ItemKind.Material:
+        return Material.fromRecord(record)
+    return Texture.fromRecord(record)
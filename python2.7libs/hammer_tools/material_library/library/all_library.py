@@ -1,3 +1,4 @@
+from ..item_record import fetchItemRecords
 from ..material import Material
 from ..texture import Texture
 from .library import Library
@@ -22,3 +23,12 @@ class AllLibrary(Library):
 
     def textures(self):
         return Texture.allTextures()
+
+    def itemRecords(self):
+        return fetchItemRecords()
+
+    def externalItems(self):
+        try:
+            return PolyHavenLibrary().materials()
+        except Exception:
+            return ()
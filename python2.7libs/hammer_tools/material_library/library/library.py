@@ -1,4 +1,5 @@
 from ..db import connect
+from ..item_record import fetchItemRecords, itemFromRecord
 from ..material import Material
 from ..texture import Texture
 
@@ -123,15 +124,25 @@ class Library(object):
 
     def textures(self):
         connection = connect()
-        textures_data = connection.execute('SELECT * FROM texture '
+        textures_data = connection.execute('SELECT id, name, comment, favorite, options, path FROM texture '
                                            'LEFT JOIN texture_library ON texture_library.texture_id = texture.id '
                                            'WHERE texture_library.library_id = :library_id',
                                            {'library_id': self.id()}).fetchall()
         connection.close()
         return tuple(Texture.fromData(data) for data in textures_data)
 
+    def itemRecords(self):
+        return fetchItemRecords('JOIN material_library ON material_library.material_id = material.id '
+                                'WHERE material_library.library_id = :library_id',
+                                'JOIN texture_library ON texture_library.texture_id = texture.id '
+                                'WHERE texture_library.library_id = :library_id',
+                                {'library_id': self.id()})
+
+    def externalItems(self):
+        return ()
+
     def items(self):
-        return self.materials() + self.textures()
+        return tuple(itemFromRecord(record) for record in self.itemRecords()) + self.externalItems()
 
     def addMaterial(self, material, external_connection=None):
         if external_connection is None:
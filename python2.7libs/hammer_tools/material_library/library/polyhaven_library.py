@@ -20,7 +20,7 @@ class PolyHavenMaterial(Material):
     def id(self):
         return self._asset_id
 
-    def thumbnail(self, engine=None, reload=False):
+    def thumbnail(self, engine=None, reload=False, size=None):
         if not self._thumbnail or reload:
             cache_path = os.path.join('D:/polyhaven_cache', self._asset_id)
             if not os.path.exists(cache_path):
@@ -1,4 +1,5 @@
 from ..db import connect
+from ..item_record import fetchItemRecords
 from ..material import Material
 from ..texture import Texture
 from .library import Library
@@ -22,6 +23,10 @@ class UnboundLibrary(Library):
     def textures(self):
         with connect() as connection:
             cursor = connection.cursor()
-            cursor.execute('SELECT * FROM texture '
+            cursor.execute('SELECT id, name, comment, favorite, options, path FROM texture '
                            'WHERE texture.id NOT IN (SELECT texture_id FROM texture_library)')
             return tuple(Texture.fromData(data) for data in cursor.fetchall())
+
+    def itemRecords(self):
+        return fetchItemRecords('WHERE material.id NOT IN (SELECT material_id FROM material_library)',
+                                'WHERE texture.id NOT IN (SELECT texture_id FROM texture_library)')
@@ -34,13 +34,20 @@ class LibraryBrowser(QWidget):
         self.proxy_model.setSourceModel(self.model)
 
         self.view = LibraryView()
+        self.view.iconSizeChanged.connect(self._updateThumbnailSize)
         self.view.setIconSize(96)
         self.view.setModel(self.proxy_model)
         main_layout.addWidget(self.view)
 
+    def _updateThumbnailSize(self, size):
+        self.model.setThumbnailSize(max(size.width(), size.height()))
+
     def reloadContent(self, preserve_selection=True):
         self.model.updateItemList()
 
+    def shutdown(self):
+        self.model.shutdown()
+
     def updateThumbnails(self):
         self.model.dataChanged.emit(self.model.index(0, 0, QModelIndex()),
                                     self.model.index(self.model.rowCount(QModelIndex()) - 1, 0, QModelIndex()),
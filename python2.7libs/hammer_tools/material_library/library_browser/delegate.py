@@ -15,6 +15,7 @@ from ..image import loadImage
 from ..texture import Texture
 from ..material import Material
 from ..engine_connector import EngineConnector
+from ..thumbnail_cache import THUMBNAIL_LEVELS
 
 FAVORITE_ENABLED_ICON = ui.icon('BUTTONS_favorites', 24)
 FAVORITE_DISABLED_ICON = ui.icon('BUTTONS_not_favorites', 24)
@@ -36,15 +37,13 @@ class LibraryItemDelegate(QStyledItemDelegate):
         self._zoomed = False
 
     def editorEvent(self, event, model, option, index):
-        current_item = index.data(InternalDataRole)
-
         rect = option.rect
         rect_indented = rect.adjusted(MARGIN_SIZE, MARGIN_SIZE, -MARGIN_SIZE, -MARGIN_SIZE)
         top_right_icon_rect = QRect(rect_indented.right() - 24, rect_indented.top(), 24, 24)
 
         if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
             if top_right_icon_rect.contains(event.pos()):
-                current_item.markAsFavorite(None)
+                model.setData(index, not index.data(FavoriteRole), FavoriteRole)
                 option.widget.update(index)
                 return True
 
@@ -56,14 +55,15 @@ class LibraryItemDelegate(QStyledItemDelegate):
 
         self._zoomed = True
 
+        current_item = index.data(InternalDataRole)
         if current_item == self._previous_item:
             option.widget.update(index)
             return False
 
         if isinstance(current_item, Material):
-            icon = current_item.thumbnail(EngineConnector.currentEngine())
+            icon = current_item.thumbnail(EngineConnector.currentEngine(), size=THUMBNAIL_LEVELS[-1])
             if icon:
-                self._image = icon.pixmap(256).toImage()
+                self._image = icon.pixmap(THUMBNAIL_LEVELS[-1]).toImage()
             else:
                 self._image = None
         elif isinstance(current_item, Texture):
@@ -89,7 +89,6 @@ class LibraryItemDelegate(QStyledItemDelegate):
         return QSize(width, height)
 
     def paint(self, painter, option, index):
-        current_item = index.data(InternalDataRole)
         selected = option.state & QStyle.State_Selected
         has_focus = option.state & QStyle.State_HasFocus
         under_cursor = option.state & QStyle.State_MouseOver
@@ -124,8 +123,7 @@ class LibraryItemDelegate(QStyledItemDelegate):
             painter.drawRect(rect.adjusted(0, 0, -adjust, -adjust))
             painter.restore()
 
-        if self._image and isinstance(current_item, (Texture, Material)) and under_cursor and \
-                QApplication.queryKeyboardModifiers() == Qt.ControlModifier:
+        if self._image and under_cursor and QApplication.queryKeyboardModifiers() == Qt.ControlModifier:
             # Draw zoomed texture
             cursor_pos = option.widget.mapFromGlobal(QCursor.pos()) - thumbnail_rect.topLeft()
             texture_width = self._image.width()
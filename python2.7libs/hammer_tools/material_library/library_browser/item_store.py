@@ -0,0 +1,82 @@
+from array import array
+from collections import OrderedDict
+
+from ..item_kind import ItemKind
+from ..item_record import ItemRecord, itemFromRecord
+from ..material import Material
+
+MATERIALIZED_ITEMS_LIMIT = 512
+
+
+class ItemStore(object):
+    __slots__ = ('_kinds', '_ids', '_favorites', '_names', '_comments', '_paths', '_thumbnail_engines',
+                 '_external_items', '_materialized_items')
+
+    def __init__(self, records=(), external_items=()):
+        self._kinds = array('b', [record.kind for record in records])
+        self._ids = array('l', [record.id for record in records])
+        self._favorites = array('b', [record.favorite for record in records])
+        self._names = [record.name for record in records]
+        self._comments = [record.comment or '' for record in records]
+        self._paths = [record.path for record in records]
+        self._thumbnail_engines = [record.thumbnail_engines for record in records]
+
+        # Items not backed by the database are kept as objects for the whole store lifetime
+        self._external_items = {}
+        for item in external_items:
+            row = len(self._names)
+            self._kinds.append(ItemKind.Material if isinstance(item, Material) else ItemKind.Texture)
+            self._ids.append(-1)
+            self._favorites.append(bool(item.isFavorite()))
+            self._names.append(item.name())
+            self._comments.append(item.comment())
+            self._paths.append(item.path())
+            self._thumbnail_engines.append(())
+            self._external_items[row] = item
+
+        self._materialized_items = OrderedDict()
+
+    def __len__(self):
+        return len(self._names)
+
+    def kind(self, row):
+        return self._kinds[row]
+
+    def id(self, row):
+        if row in self._external_items:
+            return self._external_items[row].id()
+        return self._ids[row]
+
+    def name(self, row):
+        return self._names[row]
+
+    def comment(self, row):
+        return self._comments[row]
+
+    def isFavorite(self, row):
+        return bool(self._favorites[row])
+
+    def setFavorite(self, row, state):
+        self._favorites[row] = bool(state)
+
+    def path(self, row):
+        return self._paths[row]
+
+    def thumbnailEngines(self, row):
+        return self._thumbnail_engines[row]
+
+    def record(self, row):
+        return ItemRecord(self._kinds[row], self._ids[row], self._names[row], self._comments[row],
+                          bool(self._favorites[row]), self._paths[row], self._thumbnail_engines[row])
+
+    def item(self, row):
+        if row in self._external_items:
+            return self._external_items[row]
+
+        item = self._materialized_items.pop(row, None)
+        if item is None:
+            item = itemFromRecord(self.record(row))
+            if len(self._materialized_items) >= MATERIALIZED_ITEMS_LIMIT:
+                self._materialized_items.popitem(last=False)
+        self._materialized_items[row] = item
+        return item
@@ -5,15 +5,23 @@ from ..map_type import MapType
 try:
     from PyQt5.QtWidgets import *
     from PyQt5.QtCore import *
+    from PyQt5.QtGui import QIcon
 except ImportError:
     from PySide2.QtWidgets import *
     from PySide2.QtCore import *
+    from PySide2.QtGui import QIcon
 
-from ..data_roles import InternalDataRole, FavoriteRole, TextForFilterRole
+from ..data_roles import InternalDataRole, FavoriteRole, TextForFilterRole, KindRole, IdRole
 from ..engine_connector import EngineConnector
-from ..material import Material, MISSING_MATERIAL_THUMBNAIL_ICON
-from ..texture import Texture, MISSING_TEXTURE_THUMBNAIL_ICON
+from ..item_kind import ItemKind
+from ..material import Material, missingMaterialThumbnailIcon
+from ..texture import Texture, missingTextureThumbnailIcon
+from ..thumbnail_cache import THUMBNAIL_CACHE, THUMBNAIL_LEVELS, THUMBNAIL_SIZE, thumbnailLevel
+from ..thumbnail_loader import ThumbnailLoader
 from ..tooltip_formlayout import ToolTipFormLayout
+from .item_store import ItemStore
+
+LOADING_THUMBNAIL_ICON = QIcon()
 
 
 class MaterialLibraryModel(QAbstractListModel):
@@ -21,16 +29,91 @@ class MaterialLibraryModel(QAbstractListModel):
         super(MaterialLibraryModel, self).__init__(parent)
 
         self._library = None
-        self._items = ()
+        self._store = ItemStore()
+
+        self._thumbnail_loader = ThumbnailLoader(parent=self)
+        self._thumbnail_loader.thumbnailLoaded.connect(self._onThumbnailLoaded)
+        self._thumbnail_rows = {}
+        self._thumbnail_size = THUMBNAIL_SIZE
+
+    def thumbnailSize(self):
+        return self._thumbnail_size
+
+    def setThumbnailSize(self, size):
+        level = thumbnailLevel(size)
+        if level == self._thumbnail_size:
+            return
+
+        self._thumbnail_size = level
+        self.cancelThumbnailRequests()
+        if self._store:
+            self.dataChanged.emit(self.index(0, 0, QModelIndex()),
+                                  self.index(len(self._store) - 1, 0, QModelIndex()),
+                                  (Qt.DecorationRole,))
 
     def updateItemList(self):
         if not self._library:
             return
 
         self.beginResetModel()
-        self._items = self._library.items()
+        self.cancelThumbnailRequests()
+        self._store = ItemStore(self._library.itemRecords(), self._library.externalItems())
         self.endResetModel()
 
+    def cancelThumbnailRequests(self):
+        self._thumbnail_loader.cancelAll()
+        self._thumbnail_rows.clear()
+
+    def shutdown(self):
+        self._thumbnail_loader.shutdown()
+        self._thumbnail_rows.clear()
+
+    def _onThumbnailLoaded(self, key):
+        row = self._thumbnail_rows.pop(key, None)
+        if row is None or row >= len(self._store):
+            return
+
+        index = self.index(row, 0, QModelIndex())
+        self.dataChanged.emit(index, index, (Qt.DecorationRole,))
+
+    def thumbnail(self, row):
+        kind = self._store.kind(row)
+        if kind == ItemKind.Material:
+            missing_icon = missingMaterialThumbnailIcon()
+        else:
+            missing_icon = missingTextureThumbnailIcon()
+
+        item_id = self._store.id(row)
+        if not isinstance(item_id, int):  # Not stored in the database
+            item = self._store.item(row)
+            return item.thumbnail(engine=EngineConnector.currentEngine()) or missing_icon
+
+        if kind == ItemKind.Material:
+            engine = EngineConnector.currentEngine()
+            if engine is None or engine.id() not in self._store.thumbnailEngines(row):
+                return missing_icon
+            engine_id = engine.id()
+        else:
+            if not self._store.thumbnailEngines(row):
+                return missing_icon
+            engine_id = None
+
+        key = (kind, item_id, engine_id, self._thumbnail_size)
+        pixmap = THUMBNAIL_CACHE.get(key)
+        if pixmap is None:
+            self._thumbnail_rows[key] = row
+            self._thumbnail_loader.request(key)
+            # Show another cached level while the right one is loading
+            for size in THUMBNAIL_LEVELS:
+                if (kind, item_id, engine_id, size) in THUMBNAIL_CACHE:
+                    pixmap = THUMBNAIL_CACHE.get((kind, item_id, engine_id, size))
+                    if pixmap is not None and not pixmap.isNull():
+                        return QIcon(pixmap)
+            return LOADING_THUMBNAIL_ICON
+        elif pixmap.isNull():
+            return missing_icon
+        return QIcon(pixmap)
+
     def library(self):
         return self._library
 
@@ -39,20 +122,20 @@ class MaterialLibraryModel(QAbstractListModel):
         self.updateItemList()
 
     def rowCount(self, parent=None):
-        return len(self._items)
+        return len(self._store)
 
     def index(self, row, column, parent):
         if not self.hasIndex(row, column, parent):
             return QModelIndex()
 
-        return self.createIndex(row, column, self._items[row])
+        return self.createIndex(row, column)
 
     def flags(self, index):
         if not index.isValid():
             return
 
         flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
-        if isinstance(index.internalPointer(), Texture):
+        if self._store.kind(index.row()) == ItemKind.Texture:
             return flags | Qt.ItemIsDragEnabled
         return flags
 
@@ -60,23 +143,24 @@ class MaterialLibraryModel(QAbstractListModel):
         if not index.isValid():
             return
 
-        item = index.internalPointer()
-
-        if role == InternalDataRole:
-            return item
+        row = index.row()
 
         if role == Qt.DisplayRole:
-            return item.name()
-        elif role == Qt.DecorationRole:
-            if isinstance(item, Material):
-                thumbnail = item.thumbnail(EngineConnector.currentEngine())
-                return thumbnail or MISSING_MATERIAL_THUMBNAIL_ICON
-            else:
-                thumbnail = item.thumbnail()
-                return thumbnail or MISSING_TEXTURE_THUMBNAIL_ICON
+            return self._store.name(row)
         elif role == FavoriteRole:
-            return item.isFavorite()
+            return self._store.isFavorite(row)
+        elif role == KindRole:
+            return self._store.kind(row)
+        elif role == IdRole:
+            return self._store.id(row)
+        elif role == TextForFilterRole:
+            return self._store.name(row) + self._store.comment(row)
+        elif role == InternalDataRole:
+            return self._store.item(row)
+        elif role == Qt.DecorationRole:
+            return self.thumbnail(row)
         elif role == Qt.ToolTipRole:
+            item = self._store.item(row)
             tooltip = ToolTipFormLayout()
             tooltip.addRow('<b>Type</b>', 'Material' if isinstance(item, Material) else 'Texture')
             tooltip.addRow('<b>ID</b>', item.id())
@@ -88,8 +172,16 @@ class MaterialLibraryModel(QAbstractListModel):
                 tooltip.addRow('<b>Path</b>', os.path.splitext(item.path())[0])
                 tooltip.addRow('<b>Formats</b>', ' '.join(map(str, item.formats())))
             return str(tooltip)
-        elif role == TextForFilterRole:
-            return item.name() + item.comment()
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != FavoriteRole:
+            return False
+
+        row = index.row()
+        self._store.item(row).markAsFavorite(value)
+        self._store.setFavorite(row, value)
+        self.dataChanged.emit(index, index, (FavoriteRole,))
+        return True
 
     def mimeData(self, indexes):
         data = QMimeData()
@@ -5,10 +5,11 @@ except ImportError:
     from PySide2.QtWidgets import *
     from PySide2.QtCore import *
 
-from ..data_roles import FavoriteRole, InternalDataRole, TextForFilterRole
-from ..material import Material
-from ..texture import Texture
-from ..fuzzy import fuzzyMatch, fuzzyMatchWeight
+from ..data_roles import FavoriteRole, TextForFilterRole, KindRole, IdRole
+from ..item_kind import ItemKind
+from ...fuzzy import FuzzyIndex
+from ..fuzzy import fuzzyMatchWeight
+from ..search import searchRanks
 
 
 class LibraryContentProxyModel(QSortFilterProxyModel):
@@ -19,6 +20,78 @@ class LibraryContentProxyModel(QSortFilterProxyModel):
         self._show_materials = True
         self._show_textures = True
         self._pattern = None
+        self._ranks = None
+        self._fuzzy_index = None
+        self._fuzzy_ranks = None
+
+    def setSourceModel(self, model):
+        super(LibraryContentProxyModel, self).setSourceModel(model)
+        for signal in (model.modelReset, model.rowsInserted, model.rowsRemoved):
+            signal.connect(self._onSourceChanged)
+        model.dataChanged.connect(self._onSourceDataChanged)
+        model.modelReset.connect(self.updateSearchRanks)
+
+    def _onSourceChanged(self, *args):
+        # Searches that are still running keep the previous index
+        self._fuzzy_index = None
+        self._fuzzy_ranks = None
+
+    def _onSourceDataChanged(self, top_left, bottom_right, roles=()):
+        # Loaded thumbnails and favorite marks do not change the searched texts
+        if not roles or Qt.DisplayRole in roles or TextForFilterRole in roles:
+            self._onSourceChanged()
+
+    def searchSnapshot(self):
+        if self._fuzzy_index is None:
+            source_model = self.sourceModel()
+            indices = [source_model.index(row, 0) for row in range(source_model.rowCount())]
+            fuzzy_index = FuzzyIndex(fuzzyMatchWeight)
+            fuzzy_index.setTexts((index.data(TextForFilterRole) or '' for index in indices),
+                                 (index.data(Qt.DisplayRole) or '' for index in indices))
+            self._fuzzy_index = fuzzy_index
+        return self._fuzzy_index
+
+    @staticmethod
+    def searchInSnapshot(snapshot, pattern, cancelled=None):
+        pattern = pattern.lower()
+        if not pattern:
+            return None, None
+
+        # Uses the database connection of the calling thread
+        ranks = searchRanks(pattern)
+        if ranks is not None:
+            return ranks, None
+
+        fuzzy_ranks = snapshot.ranks(pattern, cancelled)
+        if fuzzy_ranks is None:
+            return
+        return None, fuzzy_ranks
+
+    def applySearch(self, snapshot, pattern, result):
+        pattern = pattern.lower()
+        if pattern == self._pattern and snapshot is self._fuzzy_index:
+            return
+
+        self._pattern = pattern
+        self._ranks, self._fuzzy_ranks = result
+        if snapshot is not self._fuzzy_index:
+            # The source model changed during the search
+            self._fuzzy_ranks = None
+        # Only the rows that stopped or started matching are removed or inserted
+        self.invalidateFilter()
+        if not self._pattern:
+            self.sort(-1)
+        elif self.sortColumn() == 0 and self.sortOrder() == Qt.DescendingOrder:
+            # Sorting by the current column again is ignored, enabling dynamic sorting sorts the remaining rows again
+            self.setDynamicSortFilter(True)
+        else:
+            self.sort(0, Qt.DescendingOrder)
+
+    def fuzzyRanks(self):
+        # Used when the search index is not available
+        if self._fuzzy_ranks is None:
+            self._fuzzy_ranks = self.searchSnapshot().ranks(self._pattern)
+        return self._fuzzy_ranks
 
     def onlyFavoriteShown(self):
         return self._favorite_only
@@ -44,9 +117,16 @@ class LibraryContentProxyModel(QSortFilterProxyModel):
     def pattern(self):
         return self._pattern
 
+    def updateSearchRanks(self):
+        if not self._pattern:
+            return
+
+        self._ranks = searchRanks(self._pattern)
+        self.invalidate()
+
     def setPattern(self, pattern):
-        self._pattern = pattern.lower()
-        self.invalidateFilter()
+        snapshot = self.searchSnapshot()
+        self.applySearch(snapshot, pattern, self.searchInSnapshot(snapshot, pattern))
 
     def filterAcceptsRow(self, source_row, source_parent):
         current_index = self.sourceModel().index(source_row, 0, source_parent)
@@ -54,30 +134,35 @@ class LibraryContentProxyModel(QSortFilterProxyModel):
         if self._favorite_only and not current_index.data(FavoriteRole):
             return False
 
-        item = current_index.data(InternalDataRole)
-        if isinstance(item, Material) and not self._show_materials:
+        kind = current_index.data(KindRole)
+        if kind == ItemKind.Material and not self._show_materials:
             return False
 
-        if isinstance(item, Texture) and not self._show_textures:
+        if kind == ItemKind.Texture and not self._show_textures:
             return False
 
         if not self._pattern:
             return True
 
-        text = current_index.data(TextForFilterRole).lower()
-        return fuzzyMatch(self._pattern, text)
+        item_id = current_index.data(IdRole)
+        if self._ranks is not None and isinstance(item_id, int):
+            return (kind, item_id) in self._ranks
+
+        ranks = self.fuzzyRanks()
+        return source_row < len(ranks) and ranks[source_row] >= 0
 
     def lessThan(self, source_left, source_right):
         if not self._pattern:
             return source_left.row() > source_right.row()
 
-        text1 = source_left.data(Qt.DisplayRole)
-        text2 = source_right.data(Qt.DisplayRole)
-
-        weight1 = fuzzyMatchWeight(self._pattern, text1.lower())
-        weight2 = fuzzyMatchWeight(self._pattern, text2.lower())
+        if self._ranks is not None:
+            unranked = len(self._ranks)
+            rank1 = self._ranks.get((source_left.data(KindRole), source_left.data(IdRole)), unranked)
+            rank2 = self._ranks.get((source_right.data(KindRole), source_right.data(IdRole)), unranked)
+            return rank1 > rank2
 
-        return weight1 < weight2
+        ranks = self.fuzzyRanks()
+        return ranks[source_left.row()] > ranks[source_right.row()]
 
     def __getattr__(self, attr_name):
         return self.sourceModel().__getattribute__(attr_name)
@@ -28,6 +28,8 @@ class LibraryView(QListView):
         self._animation.setDuration(200)
         self._old_value = 0
         self.verticalScrollBar().valueChanged.connect(self._animate)
+        # Rows that are still visible request their thumbnails again on the next paint
+        self.verticalScrollBar().valueChanged.connect(self._cancelThumbnailRequests)
 
         self.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.setDragDropMode(QAbstractItemView.DragOnly)
@@ -58,6 +60,10 @@ class LibraryView(QListView):
         self._old_value = new_value
         self._animation.start()
 
+    def _cancelThumbnailRequests(self):
+        if self.model() is not None:
+            self.model().cancelThumbnailRequests()
+
     def library(self):
         return self.model().library()
 
@@ -20,6 +20,7 @@ class MapType(object):
     AmbientOcclusion = 'ao'
 
     __labels = None
+    __label_index = None
 
     @staticmethod
     def allTypes():
@@ -77,6 +78,7 @@ class MapType(object):
                 labels[map_type].append(label)
 
             MapType.__labels = {map_type: tuple(labels) for map_type, labels in labels.items()}
+            MapType.__label_index = None
             return MapType.__labels
 
     @staticmethod
@@ -90,25 +92,33 @@ class MapType(object):
         labels = tuple(row['label'] for row in cursor.fetchall())
         if MapType.__labels:
             MapType.__labels[map_type] = labels
+            MapType.__label_index = None
         return labels
 
     @staticmethod
-    def mapType(name):
-        name_tokens = alphaNumericTokens(name.lower())[::-1]
-        found_pos = float('+inf')
-        found_type = None
-        for map_type, tags in MapType.allLabels().items():
-            for tag in tags:
-                if tag in name_tokens:
-                    pos = name_tokens.index(tag)
-                    if pos > found_pos:
-                        continue
-                    elif pos == found_pos:
-                        raise AssertionError('Found intersections between tags in different map types.')
-                    found_pos = pos
-                    found_type = map_type
-                    break
-        return found_type or MapType.Unknown
+    def labelIndex():
+        if MapType.__label_index is None:
+            MapType.__label_index = {label: map_type
+                                     for map_type, labels in MapType.allLabels().items()
+                                     for label in labels}
+        return MapType.__label_index
+
+    @staticmethod
+    def mapType(name, label_index=None):
+        if label_index is None:
+            label_index = MapType.labelIndex()
+
+        # The label closest to the end of the name wins
+        for token in reversed(alphaNumericTokens(name.lower())):
+            map_type = label_index.get(token)
+            if map_type is not None:
+                return map_type
+        return MapType.Unknown
+
+    @staticmethod
+    def classify(names):
+        label_index = MapType.labelIndex()
+        return tuple(MapType.mapType(name, label_index) for name in names)
 
 
 DEFAULT_MAP_TYPES_LABELS = {
@@ -1,4 +1,3 @@
-import os
 import sqlite3
 
 try:
@@ -11,16 +10,22 @@ except ImportError:
 from . import ui
 from .db import connect
 from .texture import Texture
+from .texture_set import TEXTURE_SETS
 from .map_type import MapType
-from .image import imageToBytes
-from .text import convertName
+from .image import imageToBytes, thumbnailPyramid
+from .item_kind import ItemKind
+from .thumbnail_cache import THUMBNAIL_CACHE, THUMBNAIL_LEVELS, THUMBNAIL_SIZE, thumbnailLevel
+from .thumbnail_loader import readThumbnailData
 
-MISSING_MATERIAL_THUMBNAIL_ICON = ui.icon('SOP_material', 256)
+
+# Icons are created on first use, so that the module can be imported without a Qt application
+def missingMaterialThumbnailIcon():
+    return ui.cachedIcon('SOP_material', 256)
 
 
 class Material(object):
     __slots__ = ('_id', '_name', '_comment', '_favorite', '_options', '_path', '_thumbnail',
-                 '_thumbnail_engine_id', '_thumbnail')
+                 '_thumbnail_engines')
 
     def fillFromData(self, data):
         self._id = data.get('id', self._id)
@@ -36,6 +41,12 @@ class Material(object):
         mat.fillFromData(data)
         return mat
 
+    @staticmethod
+    def fromRecord(record):
+        mat = Material.fromData(record._asdict())
+        mat._thumbnail_engines = frozenset(record.thumbnail_engines)
+        return mat
+
     def asData(self):
         return {
             'id': self.id(),
@@ -80,38 +91,9 @@ class Material(object):
 
     @staticmethod
     def addMaterialsFromFolder(path, naming_options=None, library=None, favorite=False, options=None):
-        materials = []
-        for root, _, files in os.walk(path):
-            for file in files:
-                if MapType.mapType(file) not in {MapType.Unknown, MapType.Thumbnail}:
-                    mat = Material.fromData({
-                        'name': convertName(os.path.basename(root), naming_options),
-                        'favorite': favorite,
-                        'options': options,
-                        'path': root
-                    })
-                    materials.append(mat)
-                    break
+        from .ingest import ingestMaterials
 
-        connection = connect()
-        connection.execute('BEGIN')
-
-        if library is not None:
-            for mat in materials:
-                try:
-                    library.addMaterial(mat, external_connection=connection)
-                except sqlite3.IntegrityError:
-                    continue
-        else:
-            for mat in materials:
-                try:
-                    Material.addMaterialToDB(mat, external_connection=connection)
-                except sqlite3.IntegrityError:
-                    continue
-
-        connection.commit()
-        connection.close()
-        return tuple(mat for mat in materials if mat.id() is not None)
+        return ingestMaterials(path, naming_options, library, favorite, options)
 
     def __init__(self):
         self._id = None
@@ -120,7 +102,7 @@ class Material(object):
         self._favorite = None
         self._options = None
         self._path = None
-        self._thumbnail_engine_id = None
+        self._thumbnail_engines = None
         self._thumbnail = None
 
     def id(self):
@@ -165,38 +147,60 @@ class Material(object):
             connection.commit()
             connection.close()
 
-    def thumbnail(self, engine=None, reload=False):
-        if engine is not None and self.id():
-            if engine.id() != self._thumbnail_engine_id:
-                connection = connect()
-                data = connection.execute('SELECT image FROM material_thumbnail '
-                                          'WHERE material_id = :material_id AND engine_id = :engine_id',
-                                          {'material_id': self.id(), 'engine_id': engine.id()}).fetchone()
-                connection.close()
-                if data is not None:
-                    self._thumbnail = QIcon(
-                        QPixmap.fromImage(QImage.fromData(bytes(data['image']), 'png'))
-                    )
-                    self._thumbnail_engine_id = engine.id()
-                    return self._thumbnail
-        return self._thumbnail
-
-    def addThumbnail(self, image, engine_id, external_connection=None):
+    def thumbnail(self, engine=None, reload=False, size=THUMBNAIL_SIZE):
+        if engine is None or not self.id():
+            return self._thumbnail
+
+        key = (ItemKind.Material, self.id(), engine.id(), thumbnailLevel(size))
+        if reload:
+            THUMBNAIL_CACHE.remove(key)
+        else:
+            pixmap = THUMBNAIL_CACHE.get(key)
+            if pixmap is not None:
+                return QIcon(pixmap)
+
+        if self._thumbnail_engines is not None and engine.id() not in self._thumbnail_engines:
+            return self._thumbnail
+
+        data = readThumbnailData(key)
+        if data is None:
+            return self._thumbnail
+
+        pixmap = QPixmap.fromImage(QImage.fromData(data, 'png'))
+        THUMBNAIL_CACHE.insert(key, pixmap)
+        return QIcon(pixmap)
+
+    def addThumbnail(self, image, engine_id, external_connection=None, input_hash=None):
         if self.id() is None:  # Fixme
             self._thumbnail = image
             return
 
-        image_data = sqlite3.Binary(imageToBytes(image))
-
         if external_connection is None:
             connection = connect()
         else:
             connection = external_connection
 
-        connection.execute('INSERT OR REPLACE INTO material_thumbnail '
-                           '(material_id, engine_id, image) '
-                           'VALUES (:material_id, :engine_id, :image)',
-                           {'material_id': self.id(), 'engine_id': engine_id, 'image': image_data})
+        levels = [(self.id(), engine_id, size, sqlite3.Binary(imageToBytes(level)))
+                  for size, level in thumbnailPyramid(image)]
+        with connection:
+            connection.execute('DELETE FROM material_thumbnail '
+                               'WHERE material_id = :material_id AND engine_id = :engine_id',
+                               {'material_id': self.id(), 'engine_id': engine_id})
+            connection.executemany('INSERT INTO material_thumbnail (material_id, engine_id, size, image) '
+                                   'VALUES (?, ?, ?, ?)', levels)
+            # Thumbnails without a hash were not rendered from known inputs and count as stale
+            if input_hash is None:
+                connection.execute('DELETE FROM material_thumbnail_hash '
+                                   'WHERE material_id = :material_id AND engine_id = :engine_id',
+                                   {'material_id': self.id(), 'engine_id': engine_id})
+            else:
+                connection.execute('INSERT OR REPLACE INTO material_thumbnail_hash (material_id, engine_id, hash) '
+                                   'VALUES (:material_id, :engine_id, :hash)',
+                                   {'material_id': self.id(), 'engine_id': engine_id, 'hash': input_hash})
+        if self._thumbnail_engines is not None:
+            self._thumbnail_engines |= {engine_id}
+        for size in THUMBNAIL_LEVELS:
+            THUMBNAIL_CACHE.remove((ItemKind.Material, self.id(), engine_id, size))
 
         if external_connection is None:
             connection.commit()
@@ -209,12 +213,9 @@ class Material(object):
         return self._path
 
     def textures(self):  # Todo: + Textures from database
-        textures = []
-        for file_name in os.listdir(self.path()):
-            tex = Texture(file_name, self)
-            if tex.type not in {MapType.Unknown, MapType.Thumbnail}:
-                textures.append(tex)
-        return tuple(set(textures))
+        return tuple(Texture(name, self, map_type, strip_extension=False)
+                     for name, map_type in TEXTURE_SETS.textureSet(self.path())
+                     if map_type not in {MapType.Unknown, MapType.Thumbnail})
 
     def addTexture(self, texture, role=None, external_connection=None):
         if external_connection is None:
@@ -240,8 +241,7 @@ class Material(object):
         libraries_data = connection.execute('SELECT * FROM library '
                                             'LEFT JOIN material_library ON material_library.library_id = library.id '
                                             'WHERE material_library.material_id = :material_id',
-                                            {'library_id': self.id()})
-        connection.close()
+                                            {'material_id': self.id()}).fetchall()
         return tuple(Library.fromData(data) for data in libraries_data)
 
     def remove(self, external_connection=None):
@@ -14,7 +14,7 @@ import numpy as np
 import hou
 
 from . import ui
-from .text import MONOSPACE_FONT
+from .text import monospaceFont
 
 
 class TimeEstimation(object):
@@ -77,7 +77,7 @@ class InterruptableOperation(QDialog):
         layout.addWidget(self._progress_status_label, 0, 1, 1, -1)
 
         self._progress_time_label = QLabel()
-        self._progress_time_label.setFont(MONOSPACE_FONT)
+        self._progress_time_label.setFont(monospaceFont())
         self._progress_time_label.setAlignment(Qt.AlignCenter)
         self._progress_time_label.setToolTip('Elapsed / Remaining')
         layout.addWidget(self._progress_time_label, 1, 1)
@@ -128,16 +128,18 @@ class InterruptableOperation(QDialog):
         self._durations.append(current_time - self._previous_update)
         self._previous_update = current_time
 
-        time_remaining = timedelta(
-            seconds=int(timeRemaining(
-                self._durations,
-                self._count - num,
-                self._time_estimation_method
-            ))
-        )
-        self._progress_time_label.setText('{} / {}'.format(time_elapsed, time_remaining))
         if self._count:
+            time_remaining = timedelta(
+                seconds=int(timeRemaining(
+                    self._durations,
+                    self._count - num,
+                    self._time_estimation_method
+                ))
+            )
+            self._progress_time_label.setText('{} / {}'.format(time_elapsed, time_remaining))
             self._progress.setValue(num)
+        else:  # Total amount of work is unknown
+            self._progress_time_label.setText(str(time_elapsed))
 
         if status is None:
             message = '{} (Press Esc to Cancel) {} ({}%)'.format(
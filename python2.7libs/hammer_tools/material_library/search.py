@@ -0,0 +1,40 @@
+from .db import connect
+from .fuzzy import fuzzyMatchWeight
+from .text import alphaNumericTokens
+
+RERANK_COUNT = 200
+
+
+def isSearchIndexAvailable():
+    connection = connect()
+    return connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'item_search'") \
+                     .fetchone() is not None
+
+
+def searchQuery(pattern):
+    tokens = alphaNumericTokens(pattern.lower())
+    if not tokens:
+        return
+    return ' '.join('"{}"*'.format(token) for token in tokens)
+
+
+def search(pattern, limit=None, rerank_count=RERANK_COUNT):
+    query = searchQuery(pattern)
+    if query is None or not isSearchIndexAvailable():
+        return
+
+    connection = connect()
+    rows = connection.execute('SELECT rowid, name FROM item_search WHERE item_search MATCH :query '
+                              'ORDER BY bm25(item_search, 10.0, 2.0, 1.0) LIMIT :limit',
+                              {'query': query, 'limit': -1 if limit is None else limit}).fetchall()
+
+    pattern = pattern.lower()
+    top_rows = sorted(rows[:rerank_count], key=lambda row: -fuzzyMatchWeight(pattern, row['name'].lower()))
+    return tuple((row[0] % 2, row[0] // 2) for row in top_rows + rows[rerank_count:])
+
+
+def searchRanks(pattern, limit=None):
+    keys = search(pattern, limit)
+    if keys is None:
+        return
+    return {key: rank for rank, key in enumerate(keys)}
@@ -6,25 +6,23 @@ try:
 except ImportError:
     from PySide2.QtGui import QFont
 
-MONOSPACE_FONT = QFont('Monospace')
-MONOSPACE_FONT.setStyleHint(QFont.Monospace)
+_monospace_font = None
 
 
-def alphaNumericTokens(text):
-    parts = []
+# Created on first use, fonts need a running Qt application
+def monospaceFont():
+    global _monospace_font
+    if _monospace_font is None:
+        _monospace_font = QFont('Monospace')
+        _monospace_font.setStyleHint(QFont.Monospace)
+    return _monospace_font
+
 
-    buffer = ''
-    for char in text:
-        if char.isalnum():
-            buffer += char
-        elif buffer:
-            parts.append(buffer)
-            buffer = ''
+ALPHANUMERIC_TOKEN_PATTERN = re.compile(r'[^\W_]+', re.UNICODE)
 
-    if buffer:
-        parts.append(buffer)
 
-    return tuple(parts)
+def alphaNumericTokens(text):
+    return tuple(ALPHANUMERIC_TOKEN_PATTERN.findall(text))
 
 
 def replaceByPattern(file_path, tag, pattern):
@@ -56,6 +54,18 @@ NOT_ALNUM_PATTERN = re.compile(r'[\W_\s]')
 SPACE_SEQUENCES_PATTERN = re.compile(r'\s+')
 
 
+# Same as the defaults of the "Add from folder" dialog
+DEFAULT_NAMING_OPTIONS = {
+    'remove_prefix': '',
+    'remove_suffix': '',
+    'chars_to_replace_with_spaces': '*',
+    'remove_repeated_spaces': True,
+    'switch_case': True,
+    'new_case': 0,
+    'keep_words_in_all_caps': True
+}
+
+
 def convertName(name, options):  # Todo: Rewrite with args
     remove_prefix = options.get('remove_prefix')
     if remove_prefix and name.startswith(remove_prefix):
@@ -8,12 +8,18 @@ except ImportError:
 
 from . import ui
 from .db import connect
-from .image import imageToBytes
+from .image import thumbnailPyramidData
+from .item_kind import ItemKind
 from .map_type import MapType
 from .texture_format import TextureFormat
-from .text import convertName
+from .texture_set import TEXTURE_SETS
+from .thumbnail_cache import THUMBNAIL_CACHE, THUMBNAIL_LEVELS, THUMBNAIL_SIZE, thumbnailLevel
+from .thumbnail_loader import readThumbnailData
 
-MISSING_TEXTURE_THUMBNAIL_ICON = ui.icon('BUTTONS_parmmenu_texture', 256)
+
+# Icons are created on first use, so that the module can be imported without a Qt application
+def missingTextureThumbnailIcon():
+    return ui.cachedIcon('BUTTONS_parmmenu_texture', 256)
 
 
 class ThumbnailState:
@@ -40,14 +46,21 @@ class Texture(object):
         tex.fillFromData(data)
         return tex
 
+    @staticmethod
+    def fromRecord(record):
+        tex = Texture.fromData(record._asdict())
+        if not record.thumbnail_engines:
+            tex._thumbnail_state = ThumbnailState.NotExists
+        return tex
+
     def asData(self):
         return {
+            'id': self.id(),
             'name': self.name(),
             'comment': self.comment() or None,
             'favorite': self.isFavorite(),
             'options': self._options or None,
-            'path': self._path,
-            'thumbnail': sqlite3.Binary(imageToBytes(self._thumbnail)) if self._thumbnail else None
+            'path': self._path
         }
 
     @staticmethod
@@ -69,14 +82,17 @@ class Texture(object):
 
         connection.execute('PRAGMA foreign_keys = OFF')
         cursor = connection.execute(
-            'INSERT OR REPLACE INTO texture (id, name, comment, favorite, options, path, thumbnail) '
-            'VALUES (:id, :name, :comment, :favorite, :options, :path, :thumbnail)',
+            'INSERT OR REPLACE INTO texture (id, name, comment, favorite, options, path) '
+            'VALUES (:id, :name, :comment, :favorite, :options, :path)',
             texture.asData()
         )
         if texture.id() is None:
             texture._id = cursor.lastrowid
         connection.execute('PRAGMA foreign_keys = ON')
 
+        if texture._thumbnail:
+            texture.addThumbnail(texture._thumbnail, external_connection=connection)
+
         if external_connection is None:
             connection.commit()
             connection.close()
@@ -84,56 +100,22 @@ class Texture(object):
 
     @staticmethod
     def addTexturesFromFolder(path, naming_options=None, library=None, favorite=False, options=None):
-        from .engine_connector import EngineConnector
-
-        textures = []
-        supported_texture_formats = {tex_format for engine in EngineConnector.engines()
-                                     for tex_format in engine.supportedTextureFormats()}
-
-        for root, _, files in os.walk(path):
-            for file in files:
-                name, ext = os.path.splitext(file)
-                if MapType.mapType(file) == MapType.Unknown and \
-                        TextureFormat(ext) in supported_texture_formats:
-                    tex = Texture.fromData({
-                        'name': convertName(name, naming_options),
-                        'favorite': favorite,
-                        'options': options,
-                        'path': os.path.join(root, file).replace('\\', '/')
-                    })
-                    textures.append(tex)
+        from .ingest import ingestTextures
 
-        connection = connect()
-        connection.execute('BEGIN')
-
-        if library is not None:
-            for tex in textures:
-                try:
-                    library.addTexture(tex, external_connection=connection)
-                except sqlite3.IntegrityError:
-                    continue
-        else:
-            for tex in textures:
-                try:
-                    Texture.addTextureToDB(tex, external_connection=connection)
-                except sqlite3.IntegrityError:
-                    continue
+        return ingestTextures(path, naming_options, library, favorite, options)
 
-        connection.commit()
-        connection.close()
-        return tuple(tex for tex in textures if tex.id() is not None)
-
-    def __init__(self, name, material=None):
+    def __init__(self, name, material=None, map_type=None, strip_extension=True):
         self._material = material
         self._id = None
-        self._name, _ = os.path.splitext(name)
+        # Names from texture sets have no extension already and may contain dots, e.g. UDIM "diffuse.1001"
+        self._name = os.path.splitext(name)[0] if strip_extension else name
         self._comment = None
         self._favorite = False
         self._options = None
         self._path = None
         self._thumbnail_state = ThumbnailState.NotLoaded
         self._thumbnail = None
-        self._type = MapType.mapType(name)
+        self._type = MapType.mapType(name) if map_type is None else map_type
 
     def id(self):
         return self._id
@@ -180,36 +162,49 @@ class Texture(object):
             connection.commit()
             connection.close()
 
-    def thumbnail(self, reload=False, **kwargs):
-        if not self._thumbnail and self._thumbnail_state == ThumbnailState.NotLoaded or reload:
-            connection = connect()
-            data = connection.execute('SELECT thumbnail AS image FROM texture '
-                                      'WHERE id = :texture_id',
-                                      {'texture_id': self.id()}).fetchone()
-            connection.close()
-            if data['image']:
-                self._thumbnail = QPixmap.fromImage(QImage.fromData(bytes(data['image']), 'png'))
+    def thumbnail(self, reload=False, size=THUMBNAIL_SIZE, **kwargs):
+        if self.id() is None:
+            return QIcon(self._thumbnail) if self._thumbnail else None
+
+        key = (ItemKind.Texture, self.id(), None, thumbnailLevel(size))
+        if reload:
+            THUMBNAIL_CACHE.remove(key)
+            self._thumbnail_state = ThumbnailState.NotLoaded
+
+        pixmap = THUMBNAIL_CACHE.get(key)
+        if pixmap is None and self._thumbnail_state != ThumbnailState.NotExists:
+            data = readThumbnailData(key)
+            if data:
+                pixmap = QPixmap.fromImage(QImage.fromData(data, 'png'))
+                THUMBNAIL_CACHE.insert(key, pixmap)
                 self._thumbnail_state = ThumbnailState.Loaded
             else:
-                self._thumbnail = None
                 self._thumbnail_state = ThumbnailState.NotExists
 
-        return QIcon(self._thumbnail)
+        return QIcon(pixmap) if pixmap is not None else None
 
-    def addThumbnail(self, image, external_connection=None):
+    def addThumbnail(self, image, external_connection=None, levels=None):
         if self.id() is None:
             self._thumbnail = image
             return
 
-        image_data = sqlite3.Binary(imageToBytes(image))
-
         if external_connection is None:
             connection = connect()
         else:
             connection = external_connection
 
-        connection.execute('UPDATE texture SET thumbnail = :image WHERE id = :id',
-                           {'id': self.id(), 'image': image_data})
+        # Encoded levels may come from the worker threads that made them
+        if levels is None:
+            levels = thumbnailPyramidData(image)
+        levels = [(self.id(), size, sqlite3.Binary(data)) for size, data in levels]
+        with connection:
+            connection.execute('DELETE FROM texture_thumbnail WHERE texture_id = :texture_id',
+                               {'texture_id': self.id()})
+            connection.executemany('INSERT INTO texture_thumbnail (texture_id, size, image) VALUES (?, ?, ?)',
+                                   levels)
+        self._thumbnail_state = ThumbnailState.NotLoaded
+        for size in THUMBNAIL_LEVELS:
+            THUMBNAIL_CACHE.remove((ItemKind.Texture, self.id(), None, size))
 
         if external_connection is None:
             connection.commit()
@@ -222,17 +217,12 @@ class Texture(object):
         return self._type
 
     def formats(self):
-        formats = []
         if not self.id() and self._material:
             root_path = self._material.path()
             name = self._name
         else:
             root_path, name = os.path.split(self._path)
-
-        for file_name in os.listdir(root_path):
-            if file_name.startswith(name):  # Fixme
-                formats.append(TextureFormat(file_name))
-        return tuple(formats)
+        return TEXTURE_SETS.formats(root_path, name)
 
     def path(self, engine=None, tex_format=None):
         if tex_format and not isinstance(tex_format, TextureFormat):
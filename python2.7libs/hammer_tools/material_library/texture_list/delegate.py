@@ -1,15 +1,17 @@
 try:
     from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
     from PyQt5.QtCore import Qt, QSize, QRect, QPoint
-    from PyQt5.QtGui import QColor, QPainter
+    from PyQt5.QtGui import QColor, QPainter, QPixmap
 except ImportError:
     from PySide2.QtWidgets import QStyledItemDelegate, QStyle
     from PySide2.QtCore import Qt, QSize, QRect, QPoint
-    from PySide2.QtGui import QColor, QPainter
+    from PySide2.QtGui import QColor, QPainter, QPixmap
 
 from ..data_roles import InternalDataRole
 from ..image import loadImage
-from ..texture import MISSING_TEXTURE_THUMBNAIL_ICON
+from ..item_kind import ItemKind
+from ..texture import missingTextureThumbnailIcon
+from ..thumbnail_cache import THUMBNAIL_CACHE
 from ..map_type import MapType
 
 MARGIN_SIZE = 4
@@ -21,22 +23,22 @@ THUMBNAIL_SIZE = 64
 # index: QModelIndex
 
 class TextureDelegate(QStyledItemDelegate):
-    def __init__(self, parent=None):
-        super(TextureDelegate, self).__init__(parent)
-
-        self._thumbnail_cache = {}
-
     def sizeHint(self, option, index):
         return QSize(120, THUMBNAIL_SIZE + 2 * MARGIN_SIZE)
 
     def paint(self, painter, option, index):
         texture = index.data(InternalDataRole)
-        if texture not in self._thumbnail_cache:
-            image = loadImage(texture.path())
+        texture_path = texture.path()
+        key = (ItemKind.Texture, texture_path, None, THUMBNAIL_SIZE)
+        thumbnail = THUMBNAIL_CACHE.get(key)
+        if thumbnail is None:
+            image = loadImage(texture_path)
             if image:
-                image = image.scaled(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE),
-                                     Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self._thumbnail_cache[texture] = image
+                thumbnail = QPixmap.fromImage(image.scaled(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE),
+                                                           Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            else:
+                thumbnail = QPixmap()
+            THUMBNAIL_CACHE.insert(key, thumbnail)
 
         selected = option.state & QStyle.State_Selected
         has_focus = option.state & QStyle.State_HasFocus
@@ -77,8 +79,10 @@ class TextureDelegate(QStyledItemDelegate):
             painter.drawRect(option.rect.adjusted(adjust, adjust, -adjust, -adjust))
             painter.restore()
 
-        thumbnail = self._thumbnail_cache[texture] or MISSING_TEXTURE_THUMBNAIL_ICON
-        painter.drawImage(thumbnail_rect.topLeft(), thumbnail)
+        if thumbnail.isNull():
+            missingTextureThumbnailIcon().paint(painter, thumbnail_rect)
+        else:
+            painter.drawPixmap(thumbnail_rect.topLeft(), thumbnail)
         painter.drawText(map_type_rect, Qt.AlignLeft | Qt.AlignTop, MapType.typeName(texture.type()))
         painter.drawText(texture_name_rect, Qt.AlignLeft | Qt.AlignTop, texture.name())
         painter.drawText(texture_formats_rect, Qt.AlignLeft | Qt.AlignTop,
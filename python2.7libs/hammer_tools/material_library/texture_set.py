@@ -0,0 +1,142 @@
+import errno
+import json
+import os
+import threading
+from collections import OrderedDict
+from time import time
+
+from .db import connect
+from .map_type import MapType
+from .texture_format import TextureFormat
+
+# A folder is not checked for changes more often than this, in seconds
+CHECK_INTERVAL = 2.0
+
+
+def splitTextureFileName(file_name):
+    if '.' not in file_name.lstrip('.'):
+        return file_name, None
+    tex_format = TextureFormat(file_name)
+    return file_name[:-len(str(tex_format))], tex_format
+
+
+def scanTextureFiles(path):
+    files = OrderedDict()
+    for file_name in sorted(os.listdir(path)):
+        name, tex_format = splitTextureFileName(file_name)
+        if tex_format is not None:
+            files.setdefault(name, []).append(file_name)
+    return files
+
+
+class TextureSet(object):
+    __slots__ = ('_names', '_formats', '_map_types', '_label_index')
+
+    def __init__(self, files):
+        self._names = tuple(files)
+        self._formats = {name: tuple(TextureFormat(file_name) for file_name in file_names)
+                         for name, file_names in files.items()}
+        self._map_types = None
+        self._label_index = None
+
+    def mapTypes(self):
+        # Classified lazily and again after the labels were changed
+        label_index = MapType.labelIndex()
+        if label_index is not self._label_index:
+            self._map_types = tuple(MapType.mapType(name, label_index) for name in self._names)
+            self._label_index = label_index
+        return self._map_types
+
+    def __iter__(self):
+        return iter(zip(self._names, self.mapTypes()))
+
+    def __len__(self):
+        return len(self._names)
+
+    def formats(self, name):
+        return self._formats.get(name, ())
+
+
+EMPTY_TEXTURE_SET = TextureSet({})
+
+
+class TextureSetCache(object):
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def textureSet(self, path):
+        if not path:
+            return EMPTY_TEXTURE_SET
+        path = path.replace('\\', '/')
+
+        now = time()
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and now - entry[1] < CHECK_INTERVAL:
+            return entry[2]
+
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError as e:
+            if e.errno == errno.ENOENT:
+                self._discard(path)
+            return EMPTY_TEXTURE_SET
+
+        if entry is not None and entry[0] == mtime:
+            texture_set = entry[2]
+        else:
+            files = self._load(path, mtime)
+            if files is None:
+                files = scanTextureFiles(path)
+                self._store(path, mtime, files)
+            texture_set = TextureSet(files)
+
+        with self._lock:
+            self._entries[path] = (mtime, now, texture_set)
+        return texture_set
+
+    def formats(self, path, name):
+        return self.textureSet(path).formats(name)
+
+    def _load(self, path, mtime):
+        connection = connect()
+        row = connection.execute('SELECT mtime, files FROM texture_set WHERE path = :path',
+                                 {'path': path}).fetchone()
+        if row is None or row['mtime'] != mtime:
+            return
+        return OrderedDict(json.loads(row['files']))
+
+    def _store(self, path, mtime, files):
+        connection = connect()
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO texture_set (path, mtime, files) VALUES (:path, :mtime, :files)',
+                               {'path': path, 'mtime': mtime, 'files': json.dumps(list(files.items()))})
+
+    def _discard(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+        connection = connect()
+        with connection:
+            connection.execute('DELETE FROM texture_set WHERE path = :path', {'path': path})
+
+    def removeMissing(self):
+        # Folders that are never opened again are not discarded by textureSet()
+        connection = connect()
+        paths = [row['path'] for row in connection.execute('SELECT path FROM texture_set')]
+        missing = [path for path in paths if not os.path.isdir(path)]
+        for path in missing:
+            self._discard(path)
+        return len(missing)
+
+    def remove(self, path):
+        path = path.replace('\\', '/')
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+TEXTURE_SETS = TextureSetCache()
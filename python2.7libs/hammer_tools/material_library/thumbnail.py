@@ -1,23 +1,31 @@
+import hashlib
+import json
 import os
-import tempfile
-
-try:
-    from PyQt5.QtGui import QImage
-    from PyQt5.QtCore import Qt
-except ImportError:
-    from PySide2.QtGui import QImage
-    from PySide2.QtCore import Qt
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 
 import hou
 
 from .db import connect
-from .image import loadImage
+from .image import MIP_IMAGE_FORMATS, QT_IMAGE_FORMATS, readScaledImage, thumbnailPyramidData
 from .operation import InterruptableOperation
+from .path import TEMP_IMAGE_PATH
+
+# Most of the time is spent in the decoders and iconvert, which do not hold the interpreter lock
+TEXTURE_THUMBNAIL_THREAD_COUNT = cpu_count()
+TEXTURE_THUMBNAIL_BATCH_SIZE = 32
+
+# Changing it makes every stored thumbnail hash stale
+THUMBNAIL_HASH_VERSION = 2
+HASH_QUERY_CHUNK_SIZE = 500
 
 
 class MaterialPreviewScene(object):
-    def __init__(self, root='/out'):
+    def __init__(self, root='/out', image_path=TEMP_IMAGE_PATH):
         self.out_node = hou.node('/out')
+        self.render_node = None
+        self.material_node = None
+        self.image_path = image_path
 
         if root is None:
             self.obj_node = hou.node('/obj')
@@ -48,10 +56,19 @@ class MaterialPreviewScene(object):
         self.uv_node.setDisplayFlag(True)
         self.uv_node.setFirstInput(self.sphere_node)
 
+    def setMaterialNode(self, material_node):
+        # The scene is kept between renders, only the material is replaced
+        if self.material_node is not None:
+            self.material_node.destroy()
+        self.material_node = material_node
+        self.geo_node.parm('shop_materialpath').set(material_node.path())
+
     def destroy(self):
         with hou.undos.disabler():
-            self.render_node.destroy()
-            self.material_node.destroy()
+            if self.render_node is not None:
+                self.render_node.destroy()
+            if self.material_node is not None:
+                self.material_node.destroy()
             if self.obj_node.path() != '/obj':
                 self.obj_node.destroy()
             else:
@@ -60,35 +77,112 @@ class MaterialPreviewScene(object):
                 self.geo_node.destroy()
 
 
-def generateMaterialThumbnails(materials, engine, options=None, external_connection=None):
+def thumbnailInputHash(material, engine, options=None):
+    options = options or {}
+    # Unset scene options are left out, so the defaults hash the same as no options
+    scene_options = {key: value for key, value in (options.get('scene') or {}).items() if value}
+    builder = engine.thumbnailBuilder()
+
+    files = []
+    for texture in material.textures():
+        for tex_format in texture.formats():
+            path = texture.path(tex_format=tex_format)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, stat.st_size, stat.st_mtime))
+
+    # Thumbnail builders always build with their default options, so the builder id covers them
+    data = json.dumps([THUMBNAIL_HASH_VERSION, engine.id(), builder.id() if builder is not None else None,
+                       scene_options, sorted(files)], sort_keys=True, default=repr)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def storedThumbnailHashes(material_ids, engine_id, connection=None):
+    connection = connection or connect()
+    material_ids = tuple(material_ids)
+    hashes = {}
+    for start in range(0, len(material_ids), HASH_QUERY_CHUNK_SIZE):
+        chunk = material_ids[start:start + HASH_QUERY_CHUNK_SIZE]
+        rows = connection.execute('SELECT material_id, hash FROM material_thumbnail_hash '
+                                  'WHERE engine_id = ? AND material_id IN ({})'.format(', '.join('?' * len(chunk))),
+                                  (engine_id,) + chunk).fetchall()
+        hashes.update((row['material_id'], row['hash']) for row in rows)
+    return hashes
+
+
+def staleMaterialThumbnails(materials, engine, options=None, connection=None):
+    stored_hashes = storedThumbnailHashes((material.id() for material in materials if material.id() is not None),
+                                          engine.id(), connection)
+    stale = []
+    for material in materials:
+        input_hash = thumbnailInputHash(material, engine, options)
+        if stored_hashes.get(material.id()) != input_hash:
+            stale.append((material, input_hash))
+    return tuple(stale)
+
+
+def generateMaterialThumbnails(materials, engine, options=None, external_connection=None, force=False):
     if not materials:
         return
 
     if external_connection is None:
         connection = connect()
-        connection.execute('BEGIN')
     else:
         connection = external_connection
 
-    material_count = len(materials)
-    with InterruptableOperation(
+    if force:
+        pending = tuple((material, thumbnailInputHash(material, engine, options)) for material in materials)
+    else:
+        pending = staleMaterialThumbnails(materials, engine, options, connection)
+    if not pending:
+        return
+
+    material_count = len(pending)
+    with connection, InterruptableOperation(
             count=material_count,
             operation='Thumbnail rendering',
             icon='SOP_material',
             parent=hou.qt.mainWindow()
     ) as operation:
         with hou.undos.disabler():
-            for index, material in enumerate(materials, 1):
-                thumbnail = engine.createThumbnail(material, options)
-                material.addThumbnail(thumbnail, engine.id(), external_connection=connection)
-                try:
-                    operation.updateProgress(index, 'Rendering  {} / {}'.format(index, material_count))
-                except hou.OperationInterrupted:
-                    break  # Todo: Flash message
-
-    if external_connection is None:
-        connection.commit()
-        connection.close()
+            thumbnails = engine.createThumbnails([material for material, _ in pending], options)
+            try:
+                for index, (material, thumbnail) in enumerate(thumbnails, 1):
+                    material.addThumbnail(thumbnail, engine.id(), external_connection=connection,
+                                          input_hash=pending[index - 1][1])
+                    try:
+                        operation.updateProgress(index, 'Rendering  {} / {}'.format(index, material_count))
+                    except hou.OperationInterrupted:
+                        break  # Todo: Flash message
+            finally:
+                thumbnails.close()
+
+
+def textureThumbnailSource(texture):
+    formats = texture.formats()
+    for tex_format in formats:
+        if tex_format in QT_IMAGE_FORMATS:
+            return texture.path(tex_format=tex_format)
+    for tex_format in formats:
+        if tex_format in MIP_IMAGE_FORMATS:
+            return texture.path(tex_format=tex_format)
+    return texture.path()
+
+
+def makeTextureThumbnail(source):
+    texture, path = source
+    image = readScaledImage(path)
+    if image is None or image.isNull():
+        return texture, None
+    return texture, thumbnailPyramidData(image)
+
+
+def addTextureThumbnails(thumbnails, connection):
+    with connection:
+        for texture, levels in thumbnails:
+            texture.addThumbnail(None, external_connection=connection, levels=levels)
 
 
 def generateTextureThumbnails(textures, external_connection=None):
@@ -97,32 +191,33 @@ def generateTextureThumbnails(textures, external_connection=None):
 
     if external_connection is None:
         connection = connect()
-        connection.execute('BEGIN')
     else:
         connection = external_connection
 
-    with InterruptableOperation(
-            count=len(textures),
-            operation='Thumbnail creating',
-            icon='BUTTONS_parmmenu_texture',
-            parent=hou.qt.mainWindow()
-    ) as operation:
-        operation.updateProgress(status='Converting and scaling textures')
-        for num, texture in enumerate(textures, 1):
-            format_collision = set(texture.formats()).intersection(
-                {'png', 'bmp', 'tga', 'tif', 'tiff', 'jpg', 'jpeg'}
-            )
-            if format_collision:
-                image = QImage(texture.path(tex_format=format_collision.pop()))
-            else:
-                image = loadImage(texture.path())
-            texture.addThumbnail(image.scaled(256, 256, Qt.KeepAspectRatio, Qt.SmoothTransformation),
-                                 external_connection=connection)
-            try:
-                operation.updateProgress(num)
-            except hou.OperationInterrupted:
-                break  # Todo: Flash message
+    # Decoding, scaling and encoding happen in the worker threads, the database is written from this one
+    pool = ThreadPool(TEXTURE_THUMBNAIL_THREAD_COUNT)
+    try:
+        with InterruptableOperation(
+                count=len(textures),
+                operation='Thumbnail creating',
+                icon='BUTTONS_parmmenu_texture',
+                parent=hou.qt.mainWindow()
+        ) as operation:
+            operation.updateProgress(status='Converting and scaling textures')
+            # Texture sets are looked up here, so the worker threads do not touch the database
+            sources = [(texture, textureThumbnailSource(texture)) for texture in textures]
+            batch = []
+            for num, (texture, levels) in enumerate(pool.imap_unordered(makeTextureThumbnail, sources), 1):
+                if levels is not None:
+                    batch.append((texture, levels))
+                if len(batch) >= TEXTURE_THUMBNAIL_BATCH_SIZE:
+                    addTextureThumbnails(batch, connection)
+                    batch = []
+                try:
+                    operation.updateProgress(num)
+                except hou.OperationInterrupted:
+                    break  # Todo: Flash message
 
-    if external_connection is None:
-        connection.commit()
-        connection.close()
+            addTextureThumbnails(batch, connection)
+    finally:
+        pool.terminate()
@@ -0,0 +1,125 @@
+import os
+import threading
+from collections import OrderedDict
+
+THUMBNAIL_SIZE = 256
+
+# Stored thumbnail sizes, the largest one is only kept when the source image is big enough
+THUMBNAIL_LEVELS = (64, 128, 256, 512)
+
+try:
+    DEFAULT_BUDGET = int(os.environ['HAMMER_MATERIAL_LIB_THUMBNAIL_CACHE_MB']) * 1024 * 1024
+except (KeyError, ValueError):
+    DEFAULT_BUDGET = 128 * 1024 * 1024
+
+
+def thumbnailLevel(size):
+    for level in THUMBNAIL_LEVELS:
+        if level >= size:
+            return level
+    return THUMBNAIL_LEVELS[-1]
+
+
+def imageCost(image):
+    if image is None or image.isNull():
+        return 0
+    return image.width() * image.height() * max(image.depth(), 8) // 8
+
+
+class ThumbnailCache(object):
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self._budget = budget
+        self._cost = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def budget(self):
+        return self._budget
+
+    def setBudget(self, budget):
+        with self._lock:
+            self._budget = budget
+            self._evict()
+
+    def cost(self):
+        return self._cost
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self._misses += 1
+                return
+            self._entries[key] = entry
+            self._hits += 1
+            return entry[0]
+
+    def insert(self, key, image):
+        cost = imageCost(image)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._cost -= previous[1]
+            if cost > self._budget:
+                return
+            self._entries[key] = (image, cost)
+            self._cost += cost
+            self._evict()
+
+    def remove(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._cost -= entry[1]
+
+    def removeItem(self, kind, item_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == kind and key[1] == item_id]:
+                self._cost -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._cost = 0
+
+    def _evict(self):
+        while self._cost > self._budget and self._entries:
+            _, (_, cost) = self._entries.popitem(last=False)
+            self._cost -= cost
+            self._evictions += 1
+
+    def hits(self):
+        return self._hits
+
+    def misses(self):
+        return self._misses
+
+    def evictions(self):
+        return self._evictions
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'cost': self._cost,
+            'budget': self._budget,
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions
+        }
+
+    def resetStats(self):
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+
+THUMBNAIL_CACHE = ThumbnailCache()
@@ -0,0 +1,110 @@
+import sqlite3
+import threading
+
+try:
+    from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+    from PyQt5.QtGui import QImage, QPixmap
+
+    Signal = pyqtSignal
+except ImportError:
+    from PySide2.QtCore import QObject, QRunnable, QThreadPool, Signal
+    from PySide2.QtGui import QImage, QPixmap
+
+from .db import connect
+from .item_kind import ItemKind
+from .thumbnail_cache import THUMBNAIL_CACHE
+
+
+# The smallest stored level that is not smaller than the requested size, otherwise the largest one
+LEVEL_ORDER = 'ORDER BY size < :size, CASE WHEN size >= :size THEN size ELSE -size END LIMIT 1'
+
+
+def readThumbnailData(key):
+    kind, item_id, engine_id, size = key
+    connection = connect()
+    if kind == ItemKind.Material:
+        data = connection.execute('SELECT image FROM material_thumbnail '
+                                  'WHERE material_id = :material_id AND engine_id = :engine_id ' + LEVEL_ORDER,
+                                  {'material_id': item_id, 'engine_id': engine_id, 'size': size}).fetchone()
+    else:
+        data = connection.execute('SELECT image FROM texture_thumbnail WHERE texture_id = :texture_id ' + LEVEL_ORDER,
+                                  {'texture_id': item_id, 'size': size}).fetchone()
+    if data is None or data['image'] is None:
+        return
+    return bytes(data['image'])
+
+
+class ThumbnailLoadTask(QRunnable):
+    def __init__(self, loader, key):
+        super(ThumbnailLoadTask, self).__init__()
+
+        self._loader = loader
+        self._key = key
+
+    def run(self):
+        if not self._loader.isPending(self._key):
+            return
+
+        try:
+            data = readThumbnailData(self._key)
+        except sqlite3.Error:
+            self._loader.decoded.emit(self._key, None)
+            return
+
+        image = QImage.fromData(data, 'png') if data else QImage()
+        self._loader.decoded.emit(self._key, image)
+
+
+class ThumbnailLoader(QObject):
+    # Emitted in the GUI thread once the thumbnail for the key is in THUMBNAIL_CACHE
+    thumbnailLoaded = Signal(object)
+
+    # Emitted from the worker threads
+    decoded = Signal(object, object)
+
+    def __init__(self, thread_count=None, parent=None):
+        super(ThumbnailLoader, self).__init__(parent)
+
+        self._pool = QThreadPool(self)
+        # Workers keep their database connection, so the threads should not expire
+        self._pool.setExpiryTimeout(-1)
+        if thread_count:
+            self._pool.setMaxThreadCount(thread_count)
+
+        self._pending = set()
+        self._lock = threading.Lock()
+
+        self.decoded.connect(self._onDecoded)
+
+    def isPending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def request(self, key):
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._pool.start(ThumbnailLoadTask(self, key))
+
+    def cancelAll(self):
+        self._pool.clear()
+        with self._lock:
+            self._pending.clear()
+
+    def _onDecoded(self, key, image):
+        with self._lock:
+            requested = key in self._pending
+            self._pending.discard(key)
+
+        if image is None:
+            return
+
+        # Already decoded, so keep it even if the request was cancelled meanwhile
+        THUMBNAIL_CACHE.insert(key, QPixmap.fromImage(image) if not image.isNull() else QPixmap())
+        if requested:
+            self.thumbnailLoaded.emit(key)
+
+    def shutdown(self):
+        self.cancelAll()
+        self._pool.waitForDone()
@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from itertools import islice
+
+import hou
+
+from .db import connect
+from .engine_connector import EngineConnector
+from .material import Material
+from .thumbnail import staleMaterialThumbnails, thumbnailInputHash
+
+# Rendered thumbnails are written to the database in transactions of this size
+COMMIT_BATCH_SIZE = 16
+
+WORKER_MODULE = 'hammer_tools.material_library.thumbnail_worker'
+
+_output_lock = threading.Lock()
+
+
+def report(event, **data):
+    data['event'] = event
+    data['time'] = round(time.time(), 3)
+    line = json.dumps(data, sort_keys=True)
+    with _output_lock:
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+
+def findEngine(name):
+    name = name.lower()
+    for engine in EngineConnector.engines(lambda e: e.isAvailable() and e.canCreateThumbnail()):
+        engine_id = engine.id().lower()
+        if name in (engine_id, engine.name().lower(), engine_id.split(':')[0]):
+            return engine
+
+
+def workerMaterials(library_id=None, engine_id=None, missing_only=False, part=0, parts=1):
+    conditions = ['material.id % :parts = :part']
+    if library_id is not None:
+        conditions.append('material.id IN (SELECT material_id FROM material_library WHERE library_id = :library_id)')
+    if missing_only:
+        conditions.append('NOT EXISTS (SELECT 1 FROM material_thumbnail WHERE material_id = material.id '
+                          'AND engine_id = :engine_id)')
+    connection = connect()
+    materials_data = connection.execute('SELECT id, name, comment, favorite, path FROM material '
+                                        'WHERE ' + ' AND '.join(conditions) + ' ORDER BY id',
+                                        {'library_id': library_id, 'engine_id': engine_id,
+                                         'part': part, 'parts': parts}).fetchall()
+    return tuple(Material.fromData(data) for data in materials_data)
+
+
+def renderThumbnails(engine, pending, options=None, batch_size=COMMIT_BATCH_SIZE):
+    connection = connect()
+    total = len(pending)
+    report('start', total=total, engine=engine.id())
+
+    done = 0
+    if not pending:
+        report('finish', done=done, total=total)
+        return done
+
+    input_hashes = {material.id(): input_hash for material, input_hash in pending}
+    thumbnails = engine.createThumbnails([material for material, _ in pending], options)
+    try:
+        with hou.undos.disabler():
+            while True:
+                batch = tuple(islice(thumbnails, batch_size))
+                if not batch:
+                    break
+
+                with connection:
+                    for material, image in batch:
+                        material.addThumbnail(image, engine.id(), external_connection=connection,
+                                              input_hash=input_hashes[material.id()])
+                done += len(batch)
+                report('progress', done=done, total=total, material_id=batch[-1][0].id())
+    finally:
+        thumbnails.close()
+
+    report('finish', done=done, total=total)
+    return done
+
+
+def hythonExecutable():
+    if 'HFS' in os.environ:
+        hython_path = os.path.join(os.environ['HFS'], 'bin', 'hython')
+        for path in (hython_path, hython_path + '.exe'):
+            if os.path.isfile(path):
+                return path
+    return sys.executable
+
+
+def runWorkers(arguments, jobs, executable=None):
+    executable = executable or hythonExecutable()
+    processes = [subprocess.Popen([executable, '-m', WORKER_MODULE] + arguments +
+                                  ['--part', str(part), '--parts', str(jobs)],
+                                  stdout=subprocess.PIPE, universal_newlines=True)
+                 for part in range(jobs)]
+
+    done = [0] * jobs
+    totals = [0] * jobs
+
+    def forward(part, process):
+        for line in iter(process.stdout.readline, ''):
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue  # Houdini may print its own messages
+
+            if data.get('event') == 'start':
+                totals[part] = data['total']
+            elif 'done' in data:
+                done[part] = data['done']
+            data.pop('time', None)
+            report(data.pop('event', 'message'), worker=part, all_done=sum(done), all_total=sum(totals), **data)
+
+    threads = [threading.Thread(target=forward, args=(part, process)) for part, process in enumerate(processes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return_codes = [process.wait() for process in processes]
+    report('finish', done=sum(done), total=sum(totals), return_codes=return_codes)
+    return max(return_codes)
+
+
+def parseArguments(args=None):
+    parser = argparse.ArgumentParser(prog='hython -m ' + WORKER_MODULE,
+                                     description='Render material thumbnails into the material library database.')
+    parser.add_argument('--library', type=int, help='library id, all materials if omitted')
+    parser.add_argument('--engine', default='mantra', help='engine id or name')
+    parser.add_argument('--jobs', type=int, default=1, help='number of hython processes')
+    parser.add_argument('--missing', action='store_true', help='only materials without a thumbnail for the engine')
+    parser.add_argument('--stale', action='store_true',
+                        help='only materials whose textures or render settings changed since the last render')
+    parser.add_argument('--batch-size', type=int, default=COMMIT_BATCH_SIZE, help='thumbnails per transaction')
+    parser.add_argument('--part', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--parts', type=int, default=1, help=argparse.SUPPRESS)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parseArguments(args)
+
+    engine = findEngine(args.engine)
+    if engine is None:
+        report('error', message='Engine "{}" is not available or cannot render thumbnails'.format(args.engine))
+        return 2
+
+    if args.jobs > 1 and args.parts == 1:
+        arguments = ['--engine', engine.id(), '--batch-size', str(args.batch_size)]
+        if args.library is not None:
+            arguments += ['--library', str(args.library)]
+        if args.missing:
+            arguments.append('--missing')
+        if args.stale:
+            arguments.append('--stale')
+        # Creates or upgrades the database once, before the workers open it
+        connect()
+        return runWorkers(arguments, args.jobs)
+
+    materials = workerMaterials(args.library, engine.id(), args.missing, args.part, args.parts)
+    if args.stale:
+        pending = staleMaterialThumbnails(materials, engine)
+    else:
+        pending = tuple((material, thumbnailInputHash(material, engine)) for material in materials)
+    try:
+        renderThumbnails(engine, pending, batch_size=args.batch_size)
+    except hou.Error as e:
+        report('error', message=str(e))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
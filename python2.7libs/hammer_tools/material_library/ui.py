@@ -22,6 +22,17 @@ def icon(name, size=32, fallback_name='NETVIEW_debug'):
         return icon_backend('NETVIEW_debug', size, size)
 
 
+_icon_cache = {}
+
+
+def cachedIcon(name, size=32, fallback_name='NETVIEW_debug'):
+    """Return a shared icon for the specified Houdini icon name, created on the first call."""
+    key = (name, size, fallback_name)
+    if key not in _icon_cache:
+        _icon_cache[key] = icon(name, size, fallback_name)
+    return _icon_cache[key]
+
+
 if major_version == 16 and minor_version == 5 or major_version > 16:
     scale_backend = hou.ui.scaledSize
     scale_factor_backend = hou.ui.globalScaleFactor
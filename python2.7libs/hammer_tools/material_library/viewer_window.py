@@ -18,8 +18,9 @@ import hou
 from ..utils import openLocation
 from ..widgets import Slider, InputField, ComboBox
 from ..menu import Menu
+from ..search_controller import SearchController
 from . import ui
-from .db import connect
+from .db import connect, optimize
 from .data_roles import InternalDataRole
 from .engine_connector import EngineConnector
 from .library_list_browser import LibraryListBrowser
@@ -34,6 +35,7 @@ from .thumbnail import generateMaterialThumbnails, generateTextureThumbnails
 from .library import Library
 from .material import Material
 from .texture import Texture
+from .texture_set import TEXTURE_SETS
 from .build_options_window import BuildOptionsWindow
 from .edit_library_window import EditLibraryWindow
 from .edit_material_window import EditMaterialWindow
@@ -41,6 +43,7 @@ from .edit_texture_window import EditTextureWindow
 from .labels_editor.editor_window import LabelsEditorWindow
 from .filter_button import FilterButton
 from .generate_thumbnail_window import GenerateThumbnailWindow
+from .ingest import syncLibrary
 
 FAVORITE_ENABLED_ICON = ui.icon('BUTTONS_favorites', 16)
 FAVORITE_DISABLED_ICON = ui.icon('BUTTONS_not_favorites', 16)
@@ -150,7 +153,9 @@ class MaterialLibraryViewerWindow(QMainWindow):
         filters.show_materials_toggle.toggled.connect(self.library_browser.proxy_model.showMaterials)
         filters.show_textures_toggle.toggled.connect(self.library_browser.proxy_model.showTextures)
         self.favorite_toggle.toggled.connect(self.library_browser.proxy_model.showFavoriteOnly)
-        self.search_field.textChanged.connect(self.library_browser.proxy_model.setPattern)
+        # Matching runs in a worker thread, so typing stays responsive in large libraries
+        self.search_controller = SearchController(self.library_browser.proxy_model, parent=self)
+        self.search_field.textChanged.connect(self.search_controller.setPattern)
         self.library_browser.view.iconSizeChanged.connect(self.updateThumbnailSizeSlider)
         self.thumbnail_size_slider.valueChanged.connect(self.setThumbnailSize)
         self.splitter.addWidget(self.library_browser)
@@ -168,6 +173,7 @@ class MaterialLibraryViewerWindow(QMainWindow):
         self.update_thumbnails_action = None
         self.reload_action = None
         self.edit_labels_action = None
+        self.optimize_database_action = None
         self.main_menu = None
         self.content_menu = None
         self.labels_menu = None
@@ -236,9 +242,15 @@ class MaterialLibraryViewerWindow(QMainWindow):
         self.edit_labels_action = QAction(ui.icon('BUTTONS_tag', 16), 'Edit labels', self)
         self.edit_labels_action.triggered.connect(self.editLabels)
 
+        self.optimize_database_action = QAction('Optimize database', self)
+        self.optimize_database_action.triggered.connect(self.optimizeDatabase)
+
         self.generate_library_thumbnails_action = QAction('Generate thumbnails...', self)
         self.generate_library_thumbnails_action.triggered.connect(self.generateLibraryThumbnails)
 
+        self.sync_library_action = QAction('Sync with folder', self)
+        self.sync_library_action.triggered.connect(self.syncLibraries)
+
         self.open_library_location_action = QAction('Open location...', self)
         self.open_library_location_action.triggered.connect(self.openCurrentLibraryLocation)
         self.open_library_location_action.setShortcut(QKeySequence('Ctrl+L'))
@@ -318,6 +330,8 @@ class MaterialLibraryViewerWindow(QMainWindow):
 
         # self.main_menu.addAction(self.open_settings_action)
         self.main_menu.addAction(self.edit_labels_action)
+        self.main_menu.addSeparator()
+        self.main_menu.addAction(self.optimize_database_action)
 
         self.content_menu = Menu('Content', self)
         self.menuBar().addMenu(self.content_menu)
@@ -336,6 +350,7 @@ class MaterialLibraryViewerWindow(QMainWindow):
         self.library_list_browser.view.setContextMenuPolicy(Qt.CustomContextMenu)
 
         self.library_menu.addAction(self.generate_library_thumbnails_action)
+        self.library_menu.addAction(self.sync_library_action)
         self.library_menu.addSeparator()
         self.library_menu.addAction(self.open_library_location_action)
         # self.library_menu.addAction(self.assemble_library_action)
@@ -345,7 +360,7 @@ class MaterialLibraryViewerWindow(QMainWindow):
         self.library_menu.addAction(self.remove_library_action)
 
     def updateLibraryContextMenu(self):
-        pass
+        self.sync_library_action.setEnabled(bool(self.syncableLibraries()))
 
     def onLibraryContextMenuRequested(self):
         if not self.library_list_browser.hasSelection():
@@ -472,10 +487,23 @@ class MaterialLibraryViewerWindow(QMainWindow):
         self.library_list_browser.reloadContent()
         self.library_browser.reloadContent()
 
+    def shutdown(self):
+        # Stops the worker threads before the database connections are closed
+        self.search_controller.shutdown()
+        self.library_browser.shutdown()
+
     def editLabels(self):
         window = LabelsEditorWindow(hou.qt.mainWindow())
         window.show()
 
+    def optimizeDatabase(self):
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            TEXTURE_SETS.removeMissing()
+            optimize(connect(), vacuum=True)
+        finally:
+            QApplication.restoreOverrideCursor()
+
     def onAddLibrary(self):
         window = AddLibraryDialog(hou.qt.mainWindow())
         try:
@@ -503,6 +531,11 @@ class MaterialLibraryViewerWindow(QMainWindow):
             else:  # options['add_to'] == Target.NoLibrary
                 library = None
 
+            if library is not None and not library.path():
+                # Remember the folder, so that the library can be synced with it later
+                library.fillFromData({'path': options['path']})
+                Library.addLibraryToDB(library)
+
             if options['add_materials']:
                 materials = Material.addMaterialsFromFolder(options['path'],
                                                             options['naming_options'],
@@ -568,11 +601,7 @@ class MaterialLibraryViewerWindow(QMainWindow):
             options = window.options()
             builder = options['builder']
 
-        nodes = []
-        for material in self.library_browser.selectedMaterials():
-            material_node = builder.build(material, root, options=options)
-            material_node.moveToGoodPosition()
-            nodes.append(material_node)
+        nodes = builder.buildMany(self.library_browser.selectedMaterials(), root, options=options)
 
         if len(nodes) == 1:
             QApplication.clipboard().setText(nodes[0].path())
@@ -594,15 +623,42 @@ class MaterialLibraryViewerWindow(QMainWindow):
         options = window.options()
         window.deleteLater()
 
-        textures = (tex for lib in self.library_list_browser.selectedLibraries() for tex in lib.textures())
+        textures = tuple(tex for lib in self.library_list_browser.selectedLibraries() for tex in lib.textures())
         generateTextureThumbnails(textures)
 
-        materials = (mat for lib in self.library_list_browser.selectedLibraries() for mat in lib.materials())
+        # Materials that did not change since their thumbnails were rendered are skipped
+        materials = tuple(mat for lib in self.library_list_browser.selectedLibraries() for mat in lib.materials())
         for engine in options['engines']:
             generateMaterialThumbnails(materials, engine, options)
 
         self.library_browser.reloadContent(True)
 
+    def syncableLibraries(self):
+        # All, Unbound and PolyHaven are not stored in the database and have no folder of their own
+        return tuple(library for library in self.library_list_browser.selectedLibraries()
+                     if library.id() is not None)
+
+    def syncLibraries(self):
+        for library in self.syncableLibraries():
+            if not library.path():
+                path = hou.ui.selectFile(title='Folder of "{}"'.format(library.name()),
+                                         file_type=hou.fileType.Directory,
+                                         chooser_mode=hou.fileChooserMode.Read)
+                if not path:
+                    continue
+                library.fillFromData({'path': hou.expandString(path)})
+                Library.addLibraryToDB(library)
+
+            try:
+                added, moved, removed = syncLibrary(library)
+            except ValueError as e:
+                hou.ui.displayMessage(str(e), severity=hou.severityType.Error)
+                continue
+            hou.ui.setStatusMessage('{}: {} added, {} moved, {} removed'
+                                    .format(library.name(), added, moved, removed))
+
+        self.library_browser.reloadContent()
+
     def generateItemThumbnails(self):
         generateTextureThumbnails(self.library_browser.selectedTextures())
 
@@ -615,8 +671,9 @@ class MaterialLibraryViewerWindow(QMainWindow):
             options = window.options()
             window.deleteLater()
 
+            # Explicitly selected materials are always rendered again
             for engine in options['engines']:
-                generateMaterialThumbnails(materials, engine, options)
+                generateMaterialThumbnails(materials, engine, options, force=True)
         self.library_browser.reloadContent(True)
 
     def generateTextureThumbnail(self):
@@ -708,14 +765,10 @@ class MaterialLibraryViewerWindow(QMainWindow):
         window.show()
 
     def onMarkLibraryAsFavorite(self):
-        connection = connect()
-        connection.execute('BEGIN')
-
-        for library in self.library_list_browser.selectedLibraries():
-            library.markAsFavorite(not library.isFavorite(), external_connection=connection)
+        with connect() as connection:
+            for library in self.library_list_browser.selectedLibraries():
+                library.markAsFavorite(not library.isFavorite(), external_connection=connection)
 
-        connection.commit()
-        connection.close()
         self.library_list_browser.reloadContent()
 
     def editLibrary(self):
@@ -779,21 +832,14 @@ class MaterialLibraryViewerWindow(QMainWindow):
         self.library_browser.reloadContent()
 
     def onMarkItemsAsFavorite(self):
-        connection = connect()
-        connection.execute('BEGIN')
-
         state = not self.library_browser.currentItem().isFavorite()
-        for item in self.library_browser.selectedItems():
-            item.markAsFavorite(state, external_connection=connection)
+        with connect() as connection:
+            for item in self.library_browser.selectedItems():
+                item.markAsFavorite(state, external_connection=connection)
 
-        connection.commit()
-        connection.close()
         self.library_browser.reloadContent()
 
     def onRemoveLibrary(self):
-        connection = connect()
-        connection.execute('BEGIN')
-
         libraries = self.library_list_browser.selectedLibraries()
 
         window = RemoveLibraryOptionsWindow(libraries)
@@ -804,15 +850,14 @@ class MaterialLibraryViewerWindow(QMainWindow):
         finally:
             window.deleteLater()
 
-        for library in libraries:
-            library.remove(remove_materials=options['remove_materials'],
-                           only_single_bound_materials=options['only_single_bound_materials'],
-                           remove_textures=options['remove_textures'],
-                           only_single_bound_textures=options['only_single_bound_textures'],
-                           external_connection=connection)
+        with connect() as connection:
+            for library in libraries:
+                library.remove(remove_materials=options['remove_materials'],
+                               only_single_bound_materials=options['only_single_bound_materials'],
+                               remove_textures=options['remove_textures'],
+                               only_single_bound_textures=options['only_single_bound_textures'],
+                               external_connection=connection)
 
-        connection.commit()
-        connection.close()
         self.reloadContent()
 
     def onRemoveItems(self):
@@ -835,18 +880,14 @@ class MaterialLibraryViewerWindow(QMainWindow):
         finally:
             window.deleteLater()
 
-        connection = connect()
-        connection.execute('BEGIN')
-
-        if options['only_from_this_library']:
-            for item in items:
-                library.removeItem(item, external_connection=connection)
-        else:
-            for item in items:
-                item.remove(external_connection=connection)
+        with connect() as connection:
+            if options['only_from_this_library']:
+                for item in items:
+                    library.removeItem(item, external_connection=connection)
+            else:
+                for item in items:
+                    item.remove(external_connection=connection)
 
-        connection.commit()
-        connection.close()
         self.library_browser.reloadContent()
         window.deleteLater()
 
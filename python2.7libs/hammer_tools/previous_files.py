@@ -18,13 +18,16 @@ except ImportError:
 import hou
 
 from .quick_selection import FilterField
-from .utils import fuzzyMatch, openLocation
+from .fuzzy import FuzzyIndex, fuzzyMatch
+from .search_controller import SearchController
+from .utils import openLocation
 from .settings import SettingsManager
 
 settings = SettingsManager.instance()
 
 
 def importRecentFiles(watcher):
+    events = []
     try:
         with open(os.path.join(hou.homeHoudiniDirectory(), 'file.history')) as file:
             on_hip = False
@@ -37,11 +40,12 @@ def importRecentFiles(watcher):
                     in_block = True
                 elif in_block and not line.startswith('}'):
                     path = hou.expandString(line.strip(' \n'))
-                    watcher.logEvent(path, SessionWatcher.EventType.Save)
+                    events.append((path, SessionWatcher.EventType.Save, None))
                 else:
                     in_block = False
     except IOError:
         pass
+    watcher.logEvents(events)
 
 
 def importFromPreviousVersion(watcher):
@@ -78,8 +82,20 @@ def importFromPreviousVersion(watcher):
                                         'GROUP BY log.file_id '
                                         'ORDER BY log.id DESC;').fetchall()
 
-    for file_path, event, timestamp in prev_log:
-        watcher.logEvent(path, event, timestamp)
+    # Oldest first, so that the latest event keeps the highest id
+    watcher.logEvents(reversed(prev_log))
+
+
+# Older events of a file are removed, the list shows the latest one of each file
+LOG_EVENTS_PER_FILE = 10
+
+# The files that were not loaded or saved for the longest time are removed above this count
+MAX_FILES = 10000
+
+DATABASE_VERSION = 2
+
+# Rows are read from the database in pages as the view scrolls down
+PAGE_SIZE = 256
 
 
 def createDatabase(filepath):
@@ -104,6 +120,74 @@ def createDatabase(filepath):
     return db
 
 
+def compactLog(db, events_per_file=LOG_EVENTS_PER_FILE):
+    db.execute('DELETE FROM `log` WHERE `id` <= (SELECT newer.id FROM `log` AS newer WHERE newer.file_id = log.file_id '
+               'ORDER BY newer.id DESC LIMIT 1 OFFSET ?);',
+               (events_per_file,))
+
+
+def pruneFiles(db, max_files=MAX_FILES):
+    if db.execute('SELECT COUNT(*) FROM `file_last_event`;').fetchone()[0] <= max_files:
+        return
+
+    # The newest log row of a file tells when it was used last
+    old_files = ('SELECT `file_id` FROM `file_last_event` ORDER BY `log_id` DESC LIMIT -1 OFFSET {}'
+                 .format(int(max_files)))
+    db.execute('DELETE FROM `log` WHERE `file_id` IN ({});'.format(old_files))
+    db.execute('DELETE FROM `file` WHERE `id` IN ({});'.format(old_files))
+    db.execute('DELETE FROM `file_last_event` WHERE `file_id` NOT IN (SELECT `id` FROM `file`);')
+    db.execute('DELETE FROM `folder` WHERE `id` NOT IN (SELECT `folder_id` FROM `file`);')
+
+
+def upgradeDatabase(db):
+    version = db.execute('PRAGMA user_version;').fetchone()[0]
+    if version >= DATABASE_VERSION:
+        return
+
+    with db:
+        if version < 1:
+            # Merge files that were added twice, so that they can be unique
+            db.execute('UPDATE `log` SET `file_id` = (SELECT MIN(first.id) FROM `file` AS first '
+                       'JOIN `file` ON file.folder_id = first.folder_id AND file.name = first.name '
+                       'AND file.extension = first.extension WHERE file.id = log.file_id) '
+                       'WHERE `file_id` IN (SELECT `id` FROM `file`) AND `file_id` NOT IN '
+                       '(SELECT MIN(`id`) FROM `file` GROUP BY `folder_id`, `name`, `extension`);')
+            db.execute('DELETE FROM `file` WHERE `id` NOT IN '
+                       '(SELECT MIN(`id`) FROM `file` GROUP BY `folder_id`, `name`, `extension`);')
+            # folder.path is indexed by its UNIQUE constraint
+            db.execute('CREATE UNIQUE INDEX IF NOT EXISTS `file_location` '
+                       'ON `file` (`folder_id`, `name`, `extension`);')
+            db.execute('CREATE INDEX IF NOT EXISTS `log_file` ON `log` (`file_id`);')
+            compactLog(db)
+        if version < 2:
+            # The latest event of each file, kept by a trigger, so the dialog does not group the whole log
+            db.execute('CREATE TABLE IF NOT EXISTS `file_last_event` ('
+                       '`file_id` INTEGER PRIMARY KEY,'
+                       '`log_id` INTEGER NOT NULL,'
+                       '`event` INTEGER,'
+                       '`timestamp` INTEGER);')
+            db.execute('CREATE INDEX IF NOT EXISTS `file_last_event_log` ON `file_last_event` (`log_id`);')
+            db.execute('INSERT OR REPLACE INTO `file_last_event` (`file_id`, `log_id`, `event`, `timestamp`) '
+                       'SELECT `file_id`, `id`, `event`, `timestamp` FROM `log` WHERE `id` IN '
+                       '(SELECT MAX(`id`) FROM `log` WHERE `file_id` IN (SELECT `id` FROM `file`) GROUP BY `file_id`);')
+            db.execute('CREATE TRIGGER IF NOT EXISTS `log_last_event` AFTER INSERT ON `log` BEGIN '
+                       'INSERT OR REPLACE INTO `file_last_event` (`file_id`, `log_id`, `event`, `timestamp`) '
+                       'VALUES (NEW.file_id, NEW.id, NEW.event, NEW.timestamp); '
+                       'END;')
+        db.execute('PRAGMA user_version = {};'.format(DATABASE_VERSION))
+
+
+def connectDatabase():
+    db_file = os.path.abspath(os.path.join(hou.expandString(settings.value('hammer.previous_files.db_location')),
+                                           'hammer_previous_files.db'))
+    if not os.path.exists(db_file):
+        db = createDatabase(db_file)
+    else:
+        db = sqlite3.connect(db_file)
+    upgradeDatabase(db)
+    return db
+
+
 class SessionWatcher:
     class EventType:
         Load = 0
@@ -111,12 +195,7 @@ class SessionWatcher:
 
     def __init__(self):
         # Database
-        db_file = os.path.abspath(os.path.join(hou.expandString(settings.value('hammer.previous_files.db_location')),
-                                               'hammer_previous_files.db'))
-        if not os.path.exists(db_file):
-            self.db = createDatabase(db_file)
-        else:
-            self.db = sqlite3.connect(db_file)
+        self.db = connectDatabase()
 
         # First Start
         if settings.value('hammer.previous_files.first_start'):
@@ -136,38 +215,35 @@ class SessionWatcher:
 
             settings.setValue('hammer.previous_files.first_start', False)
 
-    def logEvent(self, filepath, event, timestamp=None):
-        query = self.db.cursor()
+    def __logEvent(self, filepath, event, timestamp=None):
         location, fullname = os.path.split(filepath)
         name, extension = os.path.splitext(fullname)
-        # Check folder and get id
-        r = query.execute('SELECT `id` FROM `folder` WHERE `path` == ? LIMIT 1;', (location,))
-        r = r.fetchone()
-        if r is None:
-            query.execute('INSERT INTO `folder` (`path`) VALUES (?);', (location,))
-            self.db.commit()
-            rowid = query.lastrowid
-        else:
-            rowid = r[0]
-        # Check file and get id
-        r = query.execute('SELECT `id` FROM `file` WHERE `folder_id` == ? AND `name` == ? AND `extension` == ? LIMIT 1;',
-                          (rowid, name, extension))
-        r = r.fetchone()
-        if r is None:
-            query.execute('INSERT INTO `file` (`folder_id`, `name`, `extension`) VALUES (?, ?, ?);',
-                          (rowid, name, extension))
-            self.db.commit()
-            rowid = query.lastrowid
-        else:
-            rowid = r[0]
-        # Add event to log
-        if timestamp:
-            query.execute('INSERT INTO `log` (`file_id`, `event`, `timestamp`) VALUES (?, ?, ?);',
-                          (rowid, event, timestamp))
-        else:
-            query.execute('INSERT INTO `log` (`file_id`, `event`, `timestamp`) VALUES (?, ?, datetime("now", "localtime"));',
-                          (rowid, event))
-        self.db.commit()
+        # Each statement is one lookup in the unique indexes
+        self.db.execute('INSERT OR IGNORE INTO `folder` (`path`) VALUES (?);', (location,))
+        self.db.execute('INSERT OR IGNORE INTO `file` (`folder_id`, `name`, `extension`) '
+                        'SELECT `id`, ?, ? FROM `folder` WHERE `path` = ?;',
+                        (name, extension, location))
+        file_id = self.db.execute('SELECT file.id FROM `file` JOIN `folder` ON file.folder_id = folder.id '
+                                  'WHERE folder.path = ? AND file.name = ? AND file.extension = ?;',
+                                  (location, name, extension)).fetchone()[0]
+        self.db.execute('INSERT INTO `log` (`file_id`, `event`, `timestamp`) '
+                        'VALUES (?, ?, COALESCE(?, datetime("now", "localtime")));',
+                        (file_id, event, timestamp or None))
+        # Retention, the older events of the file are removed
+        self.db.execute('DELETE FROM `log` WHERE `file_id` = ? AND `id` <= '
+                        '(SELECT `id` FROM `log` WHERE `file_id` = ? ORDER BY `id` DESC LIMIT 1 OFFSET ?);',
+                        (file_id, file_id, LOG_EVENTS_PER_FILE))
+
+    def logEvent(self, filepath, event, timestamp=None):
+        with self.db:
+            self.__logEvent(filepath, event, timestamp)
+            pruneFiles(self.db)
+
+    def logEvents(self, events):
+        with self.db:
+            for filepath, event, timestamp in events:
+                self.__logEvent(filepath, event, timestamp)
+            pruneFiles(self.db)
 
     def __call__(self, event_type):
         if event_type == hou.hipFileEventType.AfterLoad:
@@ -189,30 +265,156 @@ class FuzzyFilterProxyModel(QSortFilterProxyModel):
         super(FuzzyFilterProxyModel, self).__init__(parent)
 
         self.__filter_pattern = ''
+        self.__fuzzy_index = None
+        self.__ranks = None
         self.setDynamicSortFilter(True)
 
-    def setFilterPattern(self, pattern):
-        self.beginResetModel()
+    def setSourceModel(self, model):
+        super(FuzzyFilterProxyModel, self).setSourceModel(model)
+        self.__fuzzy_index = None
+        for signal in (model.modelReset, model.rowsInserted, model.rowsRemoved, model.layoutChanged):
+            signal.connect(self.__onSourceChanged)
+        model.dataChanged.connect(self.__onSourceDataChanged)
+
+    def __onSourceChanged(self, *args):
+        # Searches that are still running keep the previous index
+        self.__fuzzy_index = None
+        if self.__filter_pattern:
+            self.__updateRanks()
+            self.invalidate()
+
+    def __onSourceDataChanged(self, top_left, bottom_right, roles=()):
+        # Checked file existence does not change the searched texts
+        if not roles or Qt.DisplayRole in roles or Qt.UserRole in roles:
+            self.__onSourceChanged()
+
+    def __updateRanks(self):
+        self.__ranks = self.searchSnapshot().ranks(self.__filter_pattern)
+
+    def __normalizedPattern(self, pattern):
         if self.filterCaseSensitivity() == Qt.CaseInsensitive:
-            self.__filter_pattern = pattern.lower()
+            return pattern.lower()
+        return pattern
+
+    def searchSnapshot(self):
+        if self.__fuzzy_index is None:
+            source_model = self.sourceModel()
+            row_count = source_model.rowCount()
+            # Rows are filtered by the full path and ranked by the file name
+            fuzzy_index = FuzzyIndex(case_sensitive=self.filterCaseSensitivity() == Qt.CaseSensitive)
+            fuzzy_index.setTexts((source_model.index(row, 1).data(Qt.UserRole) for row in range(row_count)),
+                                 (source_model.index(row, 0).data(Qt.DisplayRole) for row in range(row_count)))
+            self.__fuzzy_index = fuzzy_index
+        return self.__fuzzy_index
+
+    @staticmethod
+    def searchInSnapshot(snapshot, pattern, cancelled=None):
+        if not pattern:
+            return ()
+        return snapshot.ranks(pattern, cancelled)
+
+    def applySearch(self, snapshot, pattern, ranks):
+        pattern = self.__normalizedPattern(pattern)
+        if pattern == self.__filter_pattern and snapshot is self.__fuzzy_index:
+            return
+
+        self.__filter_pattern = pattern
+        if not pattern:
+            self.__ranks = None
+        elif snapshot is not self.__fuzzy_index:
+            # The source model changed during the search
+            self.__updateRanks()
         else:
-            self.__filter_pattern = pattern
-        self.endResetModel()
+            self.__ranks = ranks
+        # Only the rows that stopped or started matching are removed or inserted
+        self.invalidateFilter()
+        # Sorting by the current column again is ignored, enabling dynamic sorting sorts the remaining rows again
+        self.setDynamicSortFilter(True)
+
+    def setFilterPattern(self, pattern):
+        if self.sourceModel() is None:
+            self.__filter_pattern = self.__normalizedPattern(pattern)
+            return
+
+        snapshot = self.searchSnapshot()
+        self.applySearch(snapshot, pattern, self.searchInSnapshot(snapshot, pattern))
 
     def filterAcceptsRow(self, source_row, source_parent):
-        source_model = self.sourceModel()
-        text = source_model.data(source_model.index(source_row, 1, source_parent), Qt.UserRole)
-        matches, weight = fuzzyMatch(self.__filter_pattern, text if self.filterCaseSensitivity() == Qt.CaseSensitive else text.lower())
-        return matches
+        if not self.__filter_pattern:
+            return True
+        if self.__ranks is None or source_row >= len(self.__ranks):
+            self.__updateRanks()
+        return self.__ranks[source_row] >= 0
 
     def lessThan(self, source_left, source_right):
-        text1 = source_left.data(Qt.DisplayRole)
-        _, weight1 = fuzzyMatch(self.__filter_pattern, text1 if self.filterCaseSensitivity() == Qt.CaseSensitive else text1.lower())
+        if not self.__filter_pattern:
+            # Source order in both directions
+            return (source_left.row() > source_right.row()) == (self.sortOrder() == Qt.DescendingOrder)
+
+        if source_left.column() != 0:
+            text1 = source_left.data(Qt.DisplayRole)
+            _, weight1 = fuzzyMatch(self.__filter_pattern, text1 if self.filterCaseSensitivity() == Qt.CaseSensitive else text1.lower())
 
-        text2 = source_right.data(Qt.DisplayRole)
-        _, weight2 = fuzzyMatch(self.__filter_pattern, text2 if self.filterCaseSensitivity() == Qt.CaseSensitive else text2.lower())
+            text2 = source_right.data(Qt.DisplayRole)
+            _, weight2 = fuzzyMatch(self.__filter_pattern, text2 if self.filterCaseSensitivity() == Qt.CaseSensitive else text2.lower())
 
-        return weight1 < weight2
+            return weight1 < weight2
+
+        if self.__ranks is None:
+            self.__updateRanks()
+        # The best match has the lowest rank and the view sorts in descending order
+        return self.__ranks[source_left.row()] > self.__ranks[source_right.row()]
+
+
+class FileExistenceTask(QRunnable):
+    def __init__(self, checker, path):
+        super(FileExistenceTask, self).__init__()
+
+        self._checker = checker
+        self._path = path
+
+    def run(self):
+        self._checker.checked.emit(self._path, os.path.exists(self._path))
+
+
+class FileExistenceChecker(QObject):
+    # Emitted in the GUI thread when a path was checked for the first time or its state changed
+    existenceChanged = Signal(object)
+
+    # Emitted from the worker threads
+    checked = Signal(object, bool)
+
+    def __init__(self, parent=None):
+        super(FileExistenceChecker, self).__init__(parent)
+
+        self._pool = QThreadPool(self)
+        # Paths on network drives may block, so a few are checked at once
+        self._pool.setMaxThreadCount(4)
+
+        self._exists = {}
+        self._pending = set()
+        self._outdated = set()
+
+        self.checked.connect(self._onChecked)
+
+    def exists(self, path):
+        # The last known state, None if not known yet. Unknown and outdated paths are checked in the background
+        if path not in self._pending and (path not in self._exists or path in self._outdated):
+            self._pending.add(path)
+            self._outdated.discard(path)
+            self._pool.start(FileExistenceTask(self, path))
+        return self._exists.get(path)
+
+    def refresh(self):
+        self._pool.clear()
+        self._pending.clear()
+        self._outdated = set(self._exists)
+
+    def _onChecked(self, path, exists):
+        self._pending.discard(path)
+        if self._exists.get(path) != exists:
+            self._exists[path] = exists
+            self.existenceChanged.emit(path)
 
 
 class PreviousFilesModel(QAbstractTableModel):
@@ -224,26 +426,75 @@ class PreviousFilesModel(QAbstractTableModel):
         self.__file_not_exists_icon = hou.qt.Icon('TOP_status_error', 20, 20)
 
         # Database
-        db_file = os.path.abspath(os.path.join(hou.expandString(settings.value('hammer.previous_files.db_location')),
-                                               'hammer_previous_files.db'))
-        if not os.path.exists(db_file):
-            self.db = createDatabase(db_file)
-        else:
-            self.db = sqlite3.connect(db_file)
+        self.db = connectDatabase()
 
-        self.__log = (())
+        self.__log = []
+        self.__paths = []
+        self.__rows = {}
+        self.__all_fetched = True
+
+        self.__existence_checker = FileExistenceChecker(self)
+        self.__existence_checker.existenceChanged.connect(self.__onExistenceChanged)
 
         self.updateLogData()
 
+    def __queryLog(self, limit):
+        # Newest first, continues after the last loaded row
+        condition = 'WHERE file_last_event.log_id < ? ' if self.__log else ''
+        values = (self.__log[-1][4], limit) if self.__log else (limit,)
+        return self.db.execute('SELECT file.name, folder.path, file_last_event.timestamp, file.extension, '
+                               'file_last_event.log_id FROM `file_last_event` '
+                               'JOIN `file` ON file_last_event.file_id = file.id '
+                               'JOIN `folder` ON file.folder_id = folder.id ' + condition +
+                               'ORDER BY file_last_event.log_id DESC LIMIT ?;', values).fetchall()
+
+    def __appendLog(self, entries, limit):
+        self.__all_fetched = limit < 0 or len(entries) < limit
+        for name, location, _, extension, _ in entries:
+            path = os.path.normpath(os.path.join(location, name + extension)).replace('\\', '/')
+            self.__rows[path] = len(self.__paths)
+            self.__paths.append(path)
+        self.__log.extend(entries)
+
     def updateLogData(self):
         self.beginResetModel()
-        self.__log = self.db.cursor().execute('SELECT file.name, folder.path, log.timestamp, file.extension FROM `log` '
-                                              'JOIN `file` ON log.file_id = file.id '
-                                              'JOIN `folder` ON file.folder_id = folder.id '
-                                              'GROUP BY log.file_id '
-                                              'ORDER BY log.id DESC;').fetchall()
+        self.__log = []
+        self.__paths = []
+        self.__rows = {}
+        self.__appendLog(self.__queryLog(PAGE_SIZE), PAGE_SIZE)
+        self.__existence_checker.refresh()
         self.endResetModel()
 
+    def __fetch(self, limit):
+        if self.__all_fetched:
+            return
+
+        entries = self.__queryLog(limit)
+        if not entries:
+            self.__all_fetched = True
+            return
+
+        first_row = len(self.__log)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(entries) - 1)
+        self.__appendLog(entries, limit)
+        self.endInsertRows()
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.__all_fetched
+
+    def fetchMore(self, parent):
+        if not parent.isValid():
+            self.__fetch(PAGE_SIZE)
+
+    def fetchAll(self):
+        self.__fetch(-1)
+
+    def __onExistenceChanged(self, path):
+        row = self.__rows.get(path)
+        if row is not None:
+            index = self.index(row, 0)
+            self.dataChanged.emit(index, index, (Qt.DecorationRole,))
+
     def rowCount(self, parent):
         return len(self.__log)
 
@@ -266,13 +517,13 @@ class PreviousFilesModel(QAbstractTableModel):
                 return self.__log[index.row()][index.column()]
         elif role == Qt.UserRole:
             if index.column() == 1:
-                row = index.row()
-                name, location, _, extension = self.__log[row]
-                return os.path.normpath(os.path.join(location, name + extension)).replace('\\', '/')
+                return self.__paths[index.row()]
         elif role == Qt.DecorationRole:
             if index.column() == 0 and settings.value('hammer.previous_files.check_file_existence'):
-                name, location, _, extension = self.__log[index.row()]
-                if os.path.exists(os.path.join(location, name + extension)):
+                exists = self.__existence_checker.exists(self.__paths[index.row()])
+                if exists is None:
+                    return
+                elif exists:
                     return self.__file_exists_icon
                 else:
                     return self.__file_not_exists_icon
@@ -436,7 +687,9 @@ class PreviousFiles(QDialog):
 
         self.filter_field.accepted.connect(self.openFirstFile)
         self.filter_field.downPressed.connect(self.switchToList)
-        self.filter_field.textChanged.connect(self.filter_model.setFilterPattern)
+        # Matching runs in a worker thread, so typing stays responsive with a long history
+        self.search_controller = SearchController(self.filter_model, parent=self)
+        self.filter_field.textChanged.connect(self.onFilterTextChanged)
 
         # File list menu
         self.menu = QMenu()
@@ -500,10 +753,22 @@ class PreviousFiles(QDialog):
         # Actions
         refresh_action = QAction('Refresh', self)
         refresh_action.setShortcut(QKeySequence(Qt.Key_F5))
-        refresh_action.triggered.connect(self.model.updateLogData)
+        refresh_action.triggered.connect(self.updateLogData)
         self.addAction(refresh_action)
 
+    def updateLogData(self):
+        self.model.updateLogData()
+        if self.filter_field.text():
+            self.model.fetchAll()
+
+    def onFilterTextChanged(self, text):
+        if text:
+            # Filtering covers the whole history, not only the loaded pages
+            self.model.fetchAll()
+        self.search_controller.setPattern(text)
+
     def switchToList(self):
+        self.search_controller.flush()
         self.view.setFocus()
         selection = self.view.selectionModel()
         selection.select(self.filter_model.index(0, 0), QItemSelectionModel.ClearAndSelect)
@@ -536,6 +801,7 @@ class PreviousFiles(QDialog):
         self.openFile('{}/{}'.format(location, name), silent)
 
     def openFirstFile(self):
+        self.search_controller.flush()
         selection = self.view.selectionModel()
         selection.select(self.filter_model.index(0, 0), QItemSelectionModel.ClearAndSelect)
         selection.select(self.filter_model.index(0, 1), QItemSelectionModel.Select)
@@ -679,7 +945,7 @@ class PreviousFiles(QDialog):
         qApp.clipboard().setText('\n'.join(links))
 
     def showEvent(self, event):
-        self.model.updateLogData()
+        self.updateLogData()
         self.detectCrashFile()
         self.filter_field.setFocus()
         self.filter_field.selectAll()
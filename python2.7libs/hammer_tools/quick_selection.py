@@ -13,7 +13,7 @@ except ImportError:
 
 import hou
 
-from hammer_tools.utils import fuzzyMatch
+from hammer_tools.fuzzy import FuzzyIndex
 
 
 class FilterField(QLineEdit):
@@ -48,20 +48,51 @@ class FuzzyListProxyModel(QSortFilterProxyModel):
         super(FuzzyListProxyModel, self).__init__(parent)
 
         self.__filter_pattern = ''
+        self.__fuzzy_index = FuzzyIndex()
+        self.__index_outdated = True
+        self.__ranks = None
         self.setFilterCaseSensitivity(Qt.CaseInsensitive)
 
+    def setSourceModel(self, model):
+        super(FuzzyListProxyModel, self).setSourceModel(model)
+        self.__index_outdated = True
+        for signal in (model.modelReset, model.rowsInserted, model.rowsRemoved,
+                       model.dataChanged, model.layoutChanged):
+            signal.connect(self.__onSourceChanged)
+
+    def __onSourceChanged(self, *args):
+        self.__index_outdated = True
+        if self.__filter_pattern:
+            self.__updateRanks()
+            self.invalidateFilter()
+
+    def __updateRanks(self):
+        source_model = self.sourceModel()
+        if self.__index_outdated or len(self.__fuzzy_index) != source_model.rowCount():
+            self.__fuzzy_index.setCaseSensitive(self.filterCaseSensitivity() == Qt.CaseSensitive)
+            self.__fuzzy_index.setTexts(source_model.data(source_model.index(row, 0), Qt.DisplayRole) or ''
+                                        for row in range(source_model.rowCount()))
+            self.__index_outdated = False
+        self.__ranks = self.__fuzzy_index.ranks(self.__filter_pattern)
+
     def setFilterPattern(self, pattern):
-        self.beginResetModel()
         if self.filterCaseSensitivity() == Qt.CaseInsensitive:
-            self.__filter_pattern = pattern.lower()
-        else:
-            self.__filter_pattern = pattern
-        self.endResetModel()
+            pattern = pattern.lower()
+        if pattern == self.__filter_pattern:
+            return
+        self.__filter_pattern = pattern
+        self.__ranks = None
+        if self.__filter_pattern and self.sourceModel() is not None:
+            self.__updateRanks()
+        # Only the rows that stopped or started matching are removed or inserted
+        self.invalidateFilter()
 
     def filterAcceptsRow(self, source_row, source_parent):
-        source_model = self.sourceModel()
-        text = source_model.data(source_model.index(source_row, 0, source_parent), Qt.DisplayRole)
-        return fuzzyMatch(self.__filter_pattern, text if self.filterCaseSensitivity() == Qt.CaseSensitive else text.lower())[0]
+        if not self.__filter_pattern:
+            return True
+        if self.__ranks is None or source_row >= len(self.__ranks):
+            self.__updateRanks()
+        return self.__ranks[source_row] >= 0
 
 
 class FontLabelDelegate(QStyledItemDelegate):
@@ -0,0 +1,134 @@
+import threading
+
+try:
+    from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+    Signal = pyqtSignal
+except ImportError:
+    from PySide2.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+# Milliseconds without a keystroke before the search starts
+DEBOUNCE_INTERVAL = 120
+
+
+class SearchTask(QRunnable):
+    def __init__(self, controller, generation, snapshot, pattern):
+        super(SearchTask, self).__init__()
+
+        self._controller = controller
+        self._generation = generation
+        self._snapshot = snapshot
+        self._pattern = pattern
+
+    def cancelled(self):
+        return not self._controller.isCurrent(self._generation)
+
+    def run(self):
+        if self.cancelled():
+            return
+
+        result = self._controller.model().searchInSnapshot(self._snapshot, self._pattern, self.cancelled)
+        if not self.cancelled():
+            self._controller.searched.emit(self._generation, self._snapshot, self._pattern, result)
+
+
+# Runs the searches of a proxy model in a worker thread and applies the latest result.
+# The model provides searchSnapshot() and applySearch(snapshot, pattern, result), which are called in the GUI thread,
+# and searchInSnapshot(snapshot, pattern, cancelled), which is called in the worker thread and may only read
+# the snapshot. It returns None when cancelled() became true.
+class SearchController(QObject):
+    # Emitted in the GUI thread after the result of the pattern is applied to the model
+    patternApplied = Signal(str)
+
+    # Emitted from the worker thread
+    searched = Signal(object, object, object, object)
+
+    def __init__(self, model, interval=DEBOUNCE_INTERVAL, parent=None):
+        super(SearchController, self).__init__(parent)
+
+        self._model = model
+        self._pattern = None
+        self._applied_pattern = None
+
+        # Every new pattern cancels the searches of the previous ones
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        # The worker keeps its database connection, so the thread should not expire
+        self._pool.setExpiryTimeout(-1)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._startSearch)
+
+        self.searched.connect(self._onSearched)
+
+    def model(self):
+        return self._model
+
+    def pattern(self):
+        return self._pattern
+
+    def isCurrent(self, generation):
+        with self._lock:
+            return generation == self._generation
+
+    def _nextGeneration(self):
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def isPending(self):
+        return self._pattern != self._applied_pattern
+
+    def setPattern(self, pattern):
+        if pattern == self._pattern:
+            return
+
+        self._pattern = pattern
+        self._nextGeneration()
+        self._timer.start()
+
+    def _startSearch(self):
+        if not self.isPending():
+            return
+
+        generation = self._nextGeneration()
+        self._pool.clear()
+        self._pool.start(SearchTask(self, generation, self._model.searchSnapshot(), self._pattern))
+
+    def _onSearched(self, generation, snapshot, pattern, result):
+        if not self.isCurrent(generation) or result is None:
+            return
+
+        self._apply(snapshot, pattern, result)
+
+    def _apply(self, snapshot, pattern, result):
+        # The model is changed only here, in the GUI thread, with the complete result
+        self._applied_pattern = pattern
+        self._model.applySearch(snapshot, pattern, result)
+        self.patternApplied.emit(pattern)
+
+    def flush(self):
+        # Applies the current pattern right away, when the user acts on the result before the search finished
+        self._timer.stop()
+        if not self.isPending():
+            return
+
+        self._nextGeneration()
+        self._pool.clear()
+        snapshot = self._model.searchSnapshot()
+        self._apply(snapshot, self._pattern, self._model.searchInSnapshot(snapshot, self._pattern, lambda: False))
+
+    def cancel(self):
+        self._timer.stop()
+        self._nextGeneration()
+        self._pool.clear()
+
+    def shutdown(self):
+        # Waits for the running search, so that its database connection can be closed
+        self.cancel()
+        self._pool.waitForDone()
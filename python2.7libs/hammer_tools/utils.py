@@ -12,6 +12,7 @@ except ImportError:
 
 import hou
 
+from .fuzzy import fuzzyMatch
 from .settings import SettingsManager
 
 settings = SettingsManager.instance()
@@ -41,29 +42,6 @@ def clearLayout(layout):
             child.widget().setParent(None)
 
 
-def fuzzyMatch(pattern, word):
-    if pattern == word:
-        return True, 999999
-    weight = 0
-    count = 0
-    index = 0
-    for char in word:
-        try:
-            if char == pattern[index]:
-                count += 1
-                index += 1
-            elif count != 0:
-                weight += count * count
-                count = 0
-        except IndexError:
-            pass
-    if count != 0:
-        weight += count * count
-    if index < len(pattern):
-        return False, weight
-    return True, weight
-
-
 def openLocation(path, select=False):
     if 'http' in path:
         webbrowser.open(path)